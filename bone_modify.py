@@ -18,6 +18,7 @@ import json
 import os
 from .resources import bone_dict
 from bpy.app.translations import pgettext_iface as _
+from bpy.app.handlers import persistent
 
 preset_dir = os.path.join(bpy.utils.resource_path('USER'), 'scripts', 'presets', 'L4D2 Character Tools')
 COMMON_MAPPING_FILE_PATH = os.path.join(preset_dir,"bone_dict.json")
@@ -26,6 +27,85 @@ current_bone_mapping = {}
 current_unique_mapping = {}
 current_common_mapping = {}
 
+# 骨架→网格关系索引 {骨架名称: [网格名称, ...]}，物体关系变化时由依赖图处理器置为 None
+_armature_mesh_index = None
+# 建立索引时各物体的关系 {物体名称: (父级名称, 骨架修改器目标名称)}
+_object_relations = {}
+# 建立索引时的视图层指针和物体数量，用于发现视图层切换和物体增删
+_index_view_layer = 0
+_index_object_count = 0
+
+def get_object_relation(obj):
+    """返回物体的父级名称和骨架修改器目标名称"""
+    parent = obj.parent.name if obj.parent else None
+    if obj.type != 'MESH':
+        return parent, ()
+    return parent, tuple(modifier.object.name for modifier in obj.modifiers
+                         if modifier.type == 'ARMATURE' and modifier.object)
+
+def build_armature_mesh_index(view_layer):
+    """遍历一次视图层中的物体，按父级和骨架修改器建立骨架→网格索引"""
+    global _armature_mesh_index, _object_relations, _index_view_layer, _index_object_count
+    children = {}
+    bound = {}
+    relations = {}
+    for obj in view_layer.objects:
+        relation = get_object_relation(obj)
+        relations[obj.name] = relation
+        if obj.type != 'MESH':
+            continue
+        parent, targets = relation
+        if parent and obj.parent.type == 'ARMATURE':
+            children.setdefault(parent, []).append(obj.name)
+        for target in targets:
+            bound.setdefault(target, []).append(obj.name)
+
+    # 子物体在前，其余绑定了骨架修改器的网格在后
+    index = {}
+    for armature_name in set(children) | set(bound):
+        mesh_names = children.get(armature_name, [])
+        index[armature_name] = mesh_names + [name for name in dict.fromkeys(bound.get(armature_name, []))
+                                             if name not in mesh_names]
+    _armature_mesh_index = index
+    _object_relations = relations
+    _index_view_layer = view_layer.as_pointer()
+    _index_object_count = len(bpy.data.objects)
+    return index
+
+@persistent
+def invalidate_armature_mesh_index(*args):
+    """丢弃骨架→网格索引，下次查询时重建"""
+    global _armature_mesh_index
+    _armature_mesh_index = None
+
+def get_armature_mesh_index():
+    """返回当前视图层的骨架→网格索引，必要时重建"""
+    view_layer = bpy.context.view_layer
+    if _armature_mesh_index is None or view_layer.as_pointer() != _index_view_layer:
+        return build_armature_mesh_index(view_layer)
+    return _armature_mesh_index
+
+def get_armature_meshes(armature):
+    """获取与骨架关联的所有网格物体（子物体或带有指向该骨架的骨架修改器）"""
+    objects = bpy.data.objects
+    return [obj for obj in (objects.get(name) for name in get_armature_mesh_index().get(armature.name, []))
+            if obj is not None]
+
+@persistent
+def armature_index_depsgraph_handler(scene, depsgraph):
+    """只在物体增删、改名或父级/骨架修改器变化时使索引失效"""
+    if _armature_mesh_index is None:
+        return
+    if len(bpy.data.objects) != _index_object_count:
+        invalidate_armature_mesh_index()
+        return
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object):
+            obj = update.id.original
+            if _object_relations.get(obj.name) != get_object_relation(obj):
+                invalidate_armature_mesh_index()
+                return
+
 def simplify_bonename(n):
     return n.lower().translate(dict.fromkeys(map(ord, u" _.")))
 
@@ -2739,7 +2819,19 @@ def register():
     # 初始化预设
     initialize_mapping_presets()
 
+    # 物体关系变化、撤销或载入文件时使骨架→网格索引失效
+    bpy.app.handlers.depsgraph_update_post.append(armature_index_depsgraph_handler)
+    bpy.app.handlers.undo_post.append(invalidate_armature_mesh_index)
+    bpy.app.handlers.load_post.append(invalidate_armature_mesh_index)
+
 def unregister():
+    if armature_index_depsgraph_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(armature_index_depsgraph_handler)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.load_post):
+        if invalidate_armature_mesh_index in handlers:
+            handlers.remove(invalidate_armature_mesh_index)
+    invalidate_armature_mesh_index()
+
     for cls in reversed(classes):
         try:
             bpy.utils.unregister_class(cls)
@@ -18,6 +18,7 @@ import bpy
 import os
 import re
 import json
+import numpy as np
 from bpy.types import PropertyGroup
 from bpy.props import FloatProperty, BoolProperty, IntProperty, CollectionProperty, StringProperty, EnumProperty, PointerProperty
 from .resources import flex_dict
@@ -71,9 +72,17 @@ def update_shape_key_from_plugin(self, context):
         # 确保标志被重置
         is_updating_from_plugin = False
 
+# 形态键捕获的缓存：上次比较时活动网格的 Key 数据块指针和各形态键的值
+_capture_key_pointer = 0
+_capture_values = None
+
+def reset_capture_cache():
+    global _capture_key_pointer, _capture_values
+    _capture_key_pointer = 0
+    _capture_values = None
+
 # 处理器函数，监测形态键变化
-def depsgraph_update_post_handler(scene):
-    global is_updating_from_plugin
+def depsgraph_update_post_handler(scene, depsgraph=None):
     # 如果禁用监测或正在从插件更新，则不处理
     if not scene.enable_flex_monitoring or is_updating_from_plugin:
         return
@@ -84,39 +93,72 @@ def depsgraph_update_post_handler(scene):
         # 如果没有合适的对象或形态键，清空捕获列表
         if len(scene.captured_shape_keys) > 0:
             scene.captured_shape_keys.clear()
+        reset_capture_cache()
         return
-    
-    # 遍历所有形态键
-    for shape_key in obj.data.shape_keys.key_blocks:
-        # 跳过基础形态键
-        if shape_key == obj.data.shape_keys.reference_key:
-            continue
-        
-        # 检查形态键值
-        if shape_key.value > 0:
-            # 查找是否已在捕获列表中
-            found = False
-            for captured in scene.captured_shape_keys:
-                if captured.name == shape_key.name:
-                    # 更新值
-                    if abs(captured.value - shape_key.value) > 0.001:  # 添加一点容差
-                        is_updating_from_plugin = True
-                        captured.value = shape_key.value
-                        is_updating_from_plugin = False
-                    found = True
-                    break
-            
-            # 如果不在列表中，添加它
-            if not found:
-                item = scene.captured_shape_keys.add()
-                item.name = shape_key.name
-                item.value = shape_key.value
-        else:
-            # 如果形态键值为0，从列表中移除
-            for i, captured in enumerate(scene.captured_shape_keys):
-                if captured.name == shape_key.name:
-                    scene.captured_shape_keys.remove(i)
-                    break
+
+    # 已有一次比较在等待执行时，合并到那一次
+    if bpy.app.timers.is_registered(capture_shape_keys_timer):
+        return
+    # 活动网格没有变化时，只响应触及它的 Key 数据块的更新
+    key = obj.data.shape_keys
+    if depsgraph is not None and key.as_pointer() == _capture_key_pointer and not any(
+            isinstance(update.id, bpy.types.Key) and update.id.original == key for update in depsgraph.updates):
+        return
+    bpy.app.timers.register(capture_shape_keys_timer, first_interval=1.0 / max(scene.flex_capture_rate, 1))
+
+def capture_shape_keys_timer():
+    """与缓存的值比较，只更新值发生变化的形态键对应的捕获项"""
+    global is_updating_from_plugin, _capture_key_pointer, _capture_values
+    scene = bpy.context.scene
+    obj = bpy.context.active_object
+    if not scene.enable_flex_monitoring or not obj or obj.type != 'MESH' or not obj.data.shape_keys:
+        return None
+
+    key = obj.data.shape_keys
+    key_blocks = key.key_blocks
+    values = np.empty(len(key_blocks), dtype=np.float32)
+    key_blocks.foreach_get("value", values)
+    if key.as_pointer() != _capture_key_pointer or _capture_values is None or len(_capture_values) != len(values):
+        # 活动网格或形态键数量变化时重新比较所有形态键
+        changed = np.arange(len(values))
+    else:
+        changed = np.flatnonzero(values != _capture_values)
+    _capture_key_pointer = key.as_pointer()
+    _capture_values = values
+    if len(changed) == 0:
+        return None
+
+    reference = key.reference_key
+    captured_keys = scene.captured_shape_keys
+    captured_index = {captured.name: position for position, captured in enumerate(captured_keys)}
+    removals = []
+    is_updating_from_plugin = True
+    try:
+        for index in changed.tolist():
+            shape_key = key_blocks[index]
+            # 跳过基础形态键
+            if shape_key == reference:
+                continue
+            value = float(values[index])
+            position = captured_index.get(shape_key.name)
+            if value > 0:
+                if position is None:
+                    # 如果不在列表中，添加它
+                    item = captured_keys.add()
+                    item.name = shape_key.name
+                    item.value = value
+                    captured_index[shape_key.name] = len(captured_keys) - 1
+                elif abs(captured_keys[position].value - value) > 0.001:  # 添加一点容差
+                    captured_keys[position].value = value
+            elif position is not None:
+                # 如果形态键值为0，从列表中移除
+                removals.append(position)
+        # 从后往前移除，避免索引错位
+        for position in sorted(removals, reverse=True):
+            captured_keys.remove(position)
+    finally:
+        is_updating_from_plugin = False
+    return None
 
 # 保存骨骼字典到文件
 def save_flexmix_dict(mix_dict, key_notes):
@@ -554,6 +596,8 @@ class L4D2_PT_ShapeKeyPanel(bpy.types.Panel):
         # 实时监测开关
         monitor_row = layout.row()
         monitor_row.prop(scene, "enable_flex_monitoring", text=_("Capture & Add Shape Keys to Expression Group"), icon="SHAPEKEY_DATA")
+        if scene.enable_flex_monitoring:
+            monitor_row.prop(scene, "flex_capture_rate", text="")
         
         # 当前捕获的形态键区域
         if scene.enable_flex_monitoring:
@@ -1001,7 +1045,220 @@ def add_shape_keys_to_scene_property(context, key_names):
 def check_basis_name(shape_keys):
     return '基型' if '基型' in shape_keys.key_blocks else 'Basis'
 
-def create_key(key_name, obj, shape_keys, used_as_final, auxiliary_keys, is_direct_key=False):
+# 形态键名称索引：小写名称 → 形态键，批量创建期间随新增、改名和删除增量维护
+class ShapeKeyIndex:
+    def __init__(self, shape_keys):
+        self.shape_keys = shape_keys
+        self.by_lower = {}
+        for key_block in shape_keys.key_blocks:
+            # 大小写不同的同名键以列表中靠前的为准，与原先的 next(...) 查找一致
+            self.by_lower.setdefault(key_block.name.lower(), key_block)
+
+    def get(self, name):
+        """忽略大小写查找形态键，不存在时返回 None"""
+        return self.by_lower.get(name.lower())
+
+    def __contains__(self, name):
+        return name.lower() in self.by_lower
+
+    def has_exact(self, name):
+        """名称大小写完全一致时才算存在"""
+        key_block = self.by_lower.get(name.lower())
+        return key_block is not None and key_block.name == name
+
+    def add(self, key_block):
+        self.by_lower.setdefault(key_block.name.lower(), key_block)
+
+    def remove(self, obj, name):
+        """删除精确同名的形态键，返回是否删除"""
+        lower = name.lower()
+        key_block = self.by_lower.get(lower)
+        if key_block is not None and key_block.name == name:
+            del self.by_lower[lower]
+            obj.shape_key_remove(key_block)
+            # 还有大小写不同的同名键时，改由列表中靠前的那个占用索引
+            for remaining in self.shape_keys.key_blocks:
+                if remaining.name.lower() == lower:
+                    self.by_lower[lower] = remaining
+                    break
+            return True
+        # 索引中记录的是大小写不同的另一个键，按精确名称删除，不影响索引
+        key_block = self.shape_keys.key_blocks.get(name)
+        if key_block is None:
+            return False
+        obj.shape_key_remove(key_block)
+        return True
+
+# 形态键混合器：用 NumPy 直接计算 基型 + Σ 权重 × (形态键 − 相对键)，不修改任何形态键的值
+class ShapeKeyMixer:
+    def __init__(self, obj, shape_keys):
+        self.obj = obj
+        self.shape_keys = shape_keys
+        self.vertex_count = len(obj.data.vertices)
+        self.coords_cache = {}  # {形态键名称: float32 坐标数组}
+        self.group_cache = {}   # {顶点组名称: float32 权重数组}
+
+    def coords(self, key_block):
+        """一次 foreach_get 读取形态键坐标并缓存"""
+        cached = self.coords_cache.get(key_block.name)
+        if cached is None:
+            cached = np.empty(self.vertex_count * 3, dtype=np.float32)
+            key_block.data.foreach_get("co", cached)
+            cached = cached.reshape(-1, 3)
+            self.coords_cache[key_block.name] = cached
+        return cached
+
+    def group_weights(self, group_name):
+        """读取形态键所用顶点组的权重，顶点组不存在时权重为 1"""
+        cached = self.group_cache.get(group_name)
+        if cached is None:
+            group = self.obj.vertex_groups.get(group_name)
+            if group is None:
+                cached = np.ones(self.vertex_count, dtype=np.float32)
+            else:
+                cached = np.zeros(self.vertex_count, dtype=np.float32)
+                group_index = group.index
+                for vert in self.obj.data.vertices:
+                    for element in vert.groups:
+                        if element.group == group_index:
+                            cached[vert.index] = element.weight
+            self.group_cache[group_name] = cached
+        return cached
+
+    def delta(self, key_block):
+        """形态键相对其相对键的位移，与 from_mix 一样考虑静音和顶点组，不产生位移时返回 None"""
+        if key_block is None or key_block.mute:
+            return None
+        delta = self.coords(key_block) - self.coords(key_block.relative_key)
+        if key_block.vertex_group:
+            delta *= self.group_weights(key_block.vertex_group)[:, None]
+        return delta
+
+    def mix(self, mix, key_index):
+        """按 mix 字典中的权重计算混合后的坐标"""
+        result = self.coords(self.shape_keys.reference_key).copy()
+        for mix_key, mix_value in mix.items():
+            delta = self.delta(key_index.get(mix_key)) if mix_value != 0.0 else None
+            if delta is not None:
+                result += delta * mix_value
+        return result
+
+    def create(self, key_name, coords, key_index):
+        """新建形态键并用一次 foreach_set 写入坐标"""
+        key_block = self.obj.shape_key_add(name=key_name, from_mix=False)
+        key_block.data.foreach_set("co", coords.ravel())
+        self.coords_cache[key_block.name] = coords
+        key_index.add(key_block)
+        return key_block
+
+    def discard(self, key_name):
+        self.coords_cache.pop(key_name, None)
+
+# 批量创建计划：把选中的表情和 flexmix_dict 编译为有向无环图，中间键只在内存中计算一次
+class FlexPlan:
+    def __init__(self, selected_keys, key_index):
+        self.key_index = key_index
+        self.nodes = {}       # {键名: [(子键名, 权重, 是否由计划计算), ...]}，空列表表示复制基型
+        self.order = []       # 拓扑顺序，依赖在前
+        self.cycles = []      # 循环依赖路径
+        self.missing = set()  # 网格和 flexmix_dict 中都没有的叶子键
+        self.failed = set()
+        self.finals = []      # 需要写入网格的选中键，保持用户选择的顺序
+        self.unresolved = []  # 无法创建的选中键
+        for key_name in selected_keys:
+            if self.resolve(key_name, [], direct=True):
+                self.finals.append(key_name)
+            else:
+                self.unresolved.append(key_name)
+
+    def resolve(self, key_name, stack, direct=False):
+        """后序遍历解析一个键的依赖，能够得到该键时返回 True"""
+        # 网格中已有的键是叶子，选中的键总是重新创建
+        if not direct and key_name in self.key_index:
+            return True
+        if key_name in self.nodes:
+            return True
+        if key_name in stack:
+            self.cycles.append(stack[stack.index(key_name):] + [key_name])
+            return False
+        if key_name in self.failed:
+            return False
+        if key_name not in flexmix_dict:
+            self.missing.add(key_name)
+            self.failed.add(key_name)
+            return False
+
+        mixes = flexmix_dict[key_name]
+        entries = [] if not mixes else None
+        stack.append(key_name)
+        # 与逐个创建时一样，使用第一个所有子键都能得到的组合
+        for mix in mixes:
+            if all(self.resolve(sub_key, stack) for sub_key in mix):
+                entries = [(sub_key, value, sub_key not in self.key_index) for sub_key, value in mix.items()]
+                break
+        stack.pop()
+        # 选中的键在所有子键都不存在时创建为空键
+        if entries is None and direct and not any(self.key_index.has_exact(sub_key) for mix in mixes for sub_key in mix):
+            entries = []
+        if entries is None:
+            self.failed.add(key_name)
+            return False
+        self.nodes[key_name] = entries
+        self.order.append(key_name)
+        return True
+
+    def consumer_counts(self):
+        """统计每个计算得到的键被多少个键引用，用于尽早释放中间结果"""
+        counts = dict.fromkeys(self.nodes, 0)
+        for entries in self.nodes.values():
+            for sub_key, value, computed in entries:
+                if computed:
+                    counts[sub_key] += 1
+        return counts
+
+def build_flex_keys(plan, mixer, key_index):
+    """按计划计算所有键的坐标，只把选中的键写入网格，返回创建的键名列表"""
+    computed = {}
+    remaining = plan.consumer_counts()
+    pending_finals = set(plan.finals)
+    reference = mixer.coords(mixer.shape_keys.reference_key)
+
+    def release(key_name):
+        if remaining[key_name] == 0 and key_name not in pending_finals:
+            computed.pop(key_name, None)
+
+    # 拓扑顺序保证子键先于使用它的键计算
+    for key_name in plan.order:
+        coords = reference.copy()
+        for sub_key, value, is_computed in plan.nodes[key_name]:
+            if value == 0.0:
+                delta = None
+            elif is_computed:
+                delta = computed[sub_key] - reference
+            else:
+                delta = mixer.delta(key_index.get(sub_key))
+            if delta is not None:
+                coords += delta * value
+            if is_computed:
+                remaining[sub_key] -= 1
+                release(sub_key)
+        computed[key_name] = coords
+        release(key_name)
+
+    created = []
+    for key_name in plan.finals:
+        mixer.create(key_name, computed[key_name], key_index)
+        created.append(key_name)
+        pending_finals.discard(key_name)
+        release(key_name)
+    return created
+
+def create_key(key_name, obj, shape_keys, used_as_final, auxiliary_keys, is_direct_key=False, key_index=None, mixer=None):
+    # 批量创建时由调用方传入共享的名称索引，避免每次查找都遍历全部形态键
+    if key_index is None:
+        key_index = ShapeKeyIndex(shape_keys)
+    if mixer is None:
+        mixer = ShapeKeyMixer(obj, shape_keys)
     if key_name in flexmix_dict:
         print(f"正在尝试创建形状键: {key_name}")
         mixes = flexmix_dict[key_name]
@@ -1011,10 +1268,10 @@ def create_key(key_name, obj, shape_keys, used_as_final, auxiliary_keys, is_dire
             basis_key_name = check_basis_name(shape_keys)
 
             # 使用设定的基型键名称进行检查和创建  
-            if basis_key_name not in shape_keys.key_blocks:
-                obj.shape_key_add(name=basis_key_name, from_mix=False)
+            if not key_index.has_exact(basis_key_name):
+                key_index.add(obj.shape_key_add(name=basis_key_name, from_mix=False))
             # 创建一个新的形态键,没有任何变化
-            obj.shape_key_add(name=key_name, from_mix=False)
+            key_index.add(obj.shape_key_add(name=key_name, from_mix=False))
             was_created = True
 
         # 遍历需要混合的形态键组合
@@ -1022,46 +1279,30 @@ def create_key(key_name, obj, shape_keys, used_as_final, auxiliary_keys, is_dire
             # 检查组合中的每一个单独键是否已经存在
             for sub_key in mix:
                 # 如果任一键不存在,则递归创建它
-                if sub_key.lower() not in [k.name.lower() for k in shape_keys.key_blocks.values()]:
+                if sub_key not in key_index:
                     print(f"形状键 {sub_key} 不存在,正在尝试创建...")
                     # 注意这里传入is_direct_key=False因为我们在这个阶段创建的是辅助的形态键
-                    create_key(sub_key, obj, shape_keys, used_as_final, auxiliary_keys, is_direct_key=False)
+                    create_key(sub_key, obj, shape_keys, used_as_final, auxiliary_keys, is_direct_key=False,
+                               key_index=key_index, mixer=mixer)
                 else:
                     print(f"形状键 {sub_key} 已存在。")
             # 创建当前的形态键前确认所需的键都存在
-            if all(k.lower() in [sk.name.lower() for sk in shape_keys.key_blocks.values()] for k in mix):
-                # 确保所有现有的形态键都设置为0
-                for key_block in shape_keys.key_blocks:
-                    key_block.value = 0.0
-                # 根据mix字典激活需要的形态键
-                for mix_key, mix_value in mix.items():
-                    # 获取形状键时忽略大小写
-                    found_key = next((sk for sk in shape_keys.key_blocks.values() if sk.name.lower() == mix_key.lower()), None)
-                    if found_key: # 确保找到了对应的键
-                        found_key.value = mix_value
-                # 创建混合的形态键
-                obj.shape_key_add(from_mix=True)
-                new_key = shape_keys.key_blocks[-1]
-                new_key.name = key_name
+            if all(k in key_index for k in mix):
+                # 直接计算混合坐标并写入新的形态键，不修改形态键的值，也不触发整网格的重新混合
+                mixer.create(key_name, mixer.mix(mix, key_index), key_index)
                 was_created = True
-                # 重置用于混合的形态键的值为0
-                for mix_key in mix:
-                    # 可能也需要执行大小写不敏感的匹配来查找对应的键
-                    found_key = next((sk for sk in shape_keys.key_blocks.values() if sk.name.lower() == mix_key.lower()), None)
-                    if found_key: # 确保找到了对应的键
-                        found_key.value = 0.0
                 break  # 成功创建形态键,结束循环
         if not was_created and is_direct_key:
             # 检查是否所有需要混合的键都不存在 
-            can_mix = any(sub_key in shape_keys.key_blocks for mix in mixes for sub_key in mix)
+            can_mix = any(key_index.has_exact(sub_key) for mix in mixes for sub_key in mix)
             # 如果无法混合(即所有需要混合的键都不存在),则创建一个空的键
             if not can_mix:
                 basis_key_name = check_basis_name(shape_keys)
 
                 # 使用设定的基型键名称进行检查和创建
-                if basis_key_name not in shape_keys.key_blocks:
-                    obj.shape_key_add(name=basis_key_name, from_mix=False)
-                obj.shape_key_add(name=key_name, from_mix=False)
+                if not key_index.has_exact(basis_key_name):
+                    key_index.add(obj.shape_key_add(name=basis_key_name, from_mix=False))
+                key_index.add(obj.shape_key_add(name=key_name, from_mix=False))
                 was_created = True
                 used_as_final.add(key_name)
                 print(f"由于相关键都不存在,已创建空键：{key_name}")
@@ -1076,10 +1317,8 @@ def create_key(key_name, obj, shape_keys, used_as_final, auxiliary_keys, is_dire
                 # 在此处立即删除辅助键
                 keys_to_remove = auxiliary_keys - used_as_final
                 for aux_key_name in keys_to_remove:
-                    key_index = obj.data.shape_keys.key_blocks.find(aux_key_name)
-                    if key_index != -1:
-                        obj.active_shape_key_index = key_index
-                        bpy.ops.object.shape_key_remove()
+                    mixer.discard(aux_key_name)
+                    if key_index.remove(obj, aux_key_name):
                         print(f"删除未使用的辅助键：{aux_key_name}")
                 # 清空辅助键集合
                 auxiliary_keys.clear()
@@ -1126,6 +1365,7 @@ class L4D2_OT_CreateSelectedKey(bpy.types.Operator):
         bpy.context.object.use_shape_key_edit_mode = False
         
         create_key(selected_key, obj, shape_keys, used_as_final, auxiliary_keys, is_direct_key=True)
+        obj.data.update()
         
         add_shape_keys_to_scene_property(context, list(used_as_final))
 
@@ -1163,23 +1403,94 @@ class L4D2_OT_AllCreate(bpy.types.Operator):
             self.report({'ERROR'}, _("Please select the expressions to create from the main panel list first"))
             return {'CANCELLED'}
 
-        # 初始化最终使用和辅助键集合
-        used_as_final = set()
-        auxiliary_keys = set()
+        # 名称索引只建立一次，创建形态键时增量更新
+        key_index = ShapeKeyIndex(shape_keys)
+        # 先编译依赖图，在修改网格之前报告循环依赖和缺失的键
+        plan = FlexPlan(selected_keys, key_index)
+        if plan.cycles:
+            cycle_text = "; ".join(" -> ".join(cycle) for cycle in plan.cycles)
+            self.report({'ERROR'}, f"{_('Circular dependency in flex mixes')}: {cycle_text}")
+            return {'CANCELLED'}
+        if plan.missing:
+            print(f"缺失的形态键: {sorted(plan.missing)}")
+            self.report({'WARNING'}, f"{_('Missing shape keys')}: {', '.join(sorted(plan.missing))}")
+        if plan.unresolved:
+            self.report({'WARNING'}, f"{_('Cannot create')}: {', '.join(plan.unresolved)}")
+
         # 退出形态键锁定/编辑模式
         bpy.context.object.show_only_shape_key = False
         bpy.context.object.use_shape_key_edit_mode = False
-        # 遍历所有选择的目标键并创建它们
-        for key_name in selected_keys:
-            create_key(key_name, obj, shape_keys, used_as_final, auxiliary_keys, is_direct_key=True)
+        # 中间键只在内存中计算，只有选中的键写入网格
+        mixer = ShapeKeyMixer(obj, shape_keys)
+        created = build_flex_keys(plan, mixer, key_index)
+        obj.data.update()
         # 将创建的键添加到场景属性中
-        add_shape_keys_to_scene_property(context, list(used_as_final))
-        print(f"标记为最终使用的键: {used_as_final}")
+        add_shape_keys_to_scene_property(context, created)
+        print(f"标记为最终使用的键: {created}")
         
-        self.report({'INFO'}, f"{_('Batch created')} {len(used_as_final)} {_('shape keys')}")
+        self.report({'INFO'}, f"{_('Batch created')} {len(created)} {_('shape keys')}")
         return {'FINISHED'}
 
 
+def reorganize_shape_keys(obj, keep_names, order):
+    """一次遍历删除多余的形态键，并把保留的形态键按 order 排序，只使用数据 API
+
+    Blender 没有移动形态键的数据 API，因此从第一个顺序不符的键开始，把之后保留的键读入数组，
+    与多余的键一起按索引倒序删除，再按目标顺序重新添加并用 foreach_set 写回坐标和属性。
+    返回删除的形态键数量。
+    """
+    key_blocks = obj.data.shape_keys.key_blocks
+    reference = obj.data.shape_keys.reference_key
+    current = [key_block.name for key_block in key_blocks if key_block != reference]
+    kept = [name for name in current if name in keep_names]
+    # 预设中的键按预设顺序在前，其余保留的键保持原有顺序
+    rank = {name: position for position, name in enumerate(order)}
+    target = sorted(kept, key=lambda name: rank.get(name, len(rank)))
+
+    # 找到与目标顺序一致的最长前缀，这部分保留的键无需重建
+    prefix = 0
+    while prefix < len(kept) and kept[prefix] == target[prefix]:
+        prefix += 1
+    stable = set(kept[:prefix])
+    rebuild = target[prefix:]
+
+    # 记录所有保留键的相对键，以及需要重建的键的坐标和属性
+    relative_names = {name: key_blocks[name].relative_key.name for name in kept}
+    vertex_count = len(obj.data.vertices)
+    saved = {}
+    for name in rebuild:
+        key_block = key_blocks[name]
+        coords = np.empty(vertex_count * 3, dtype=np.float32)
+        key_block.data.foreach_get("co", coords)
+        saved[name] = (coords, key_block.value, key_block.slider_min, key_block.slider_max,
+                       key_block.vertex_group, key_block.interpolation, key_block.mute)
+
+    # 按索引倒序删除，删除靠后的键不会影响靠前的键的索引
+    removed = 0
+    for key_block in reversed(key_blocks[:]):
+        if key_block != reference and key_block.name not in stable:
+            if key_block.name not in keep_names:
+                removed += 1
+            obj.shape_key_remove(key_block)
+
+    for name in rebuild:
+        coords, value, slider_min, slider_max, vertex_group, interpolation, mute = saved[name]
+        key_block = obj.shape_key_add(name=name, from_mix=False)
+        key_block.data.foreach_set("co", coords)
+        # Blender 会把 slider_min 钳制在 slider_max 之下（反之亦然），先放开下限再依次设置
+        key_block.slider_min = -10.0
+        key_block.slider_max = slider_max
+        key_block.slider_min = slider_min
+        key_block.value = value
+        key_block.vertex_group = vertex_group
+        key_block.interpolation = interpolation
+        key_block.mute = mute
+
+    for name, relative_name in relative_names.items():
+        key_blocks[name].relative_key = key_blocks.get(relative_name, reference)
+    obj.data.update()
+    return removed
+
 class L4D2_OT_SortShapeKeys(bpy.types.Operator):
     bl_idname = "l4d2.sort_shape_keys"
     bl_label = _("Organize Shape Keys")
@@ -1218,15 +1529,9 @@ class L4D2_OT_SortShapeKeys(bpy.types.Operator):
             bpy.context.object.active_shape_key_index = basis_index
             bpy.ops.object.shape_key_move(type='TOP')
 
-        # 初始化删除计数器
-        deleted_keys_count = 0
-        
-        # 遍历形态键集合，删除不是由特定操作创建的形态键
-        for key in shape_keys[:]:  # 复制一份形态键列表用于遍历
-            if key.name not in created_keys and key.name != basis_name:  # 如果键名不在创建列表中，并且不是基础形状键
-                bpy.context.object.active_shape_key_index = shape_keys.keys().index(key.name)  # 设为活动形态键
-                bpy.ops.object.shape_key_remove(all=False)  # 移除当前形态键
-                deleted_keys_count += 1  # 删除计数器增加         
+        # 一次遍历删除不是由插件创建的形态键，并按当前预设的顺序排列保留的形态键
+        preset_order = [item.name for item in context.window_manager.flexmix_items]
+        deleted_keys_count = reorganize_shape_keys(obj, created_keys, preset_order)
         self.report({'INFO'}, f"{_('Deleted')} {deleted_keys_count} {_('redundant shape keys.')}")
 
         return {'FINISHED'}
@@ -1335,6 +1640,14 @@ def register():
             default=False
         )
         
+        bpy.types.Scene.flex_capture_rate = IntProperty(
+            name=_("Capture Rate"),
+            description=_("Maximum number of shape key captures per second while monitoring"),
+            default=10,
+            min=1,
+            max=60
+        )
+        
         bpy.types.Scene.captured_shape_keys = CollectionProperty(
             type=FlexCapturedKey,
             name=_("Captured Shape Keys"),
@@ -1367,6 +1680,9 @@ def unregister():
     # 移除依赖图更新处理器
     if depsgraph_update_post_handler in bpy.app.handlers.depsgraph_update_post:
         bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update_post_handler)
+    if bpy.app.timers.is_registered(capture_shape_keys_timer):
+        bpy.app.timers.unregister(capture_shape_keys_timer)
+    reset_capture_cache()
     
     try:
         # 注销捕获项类
@@ -1386,6 +1702,7 @@ def unregister():
         del bpy.types.WindowManager.flexmix_items
         del bpy.types.WindowManager.flexmix_index
         del bpy.types.Scene.enable_flex_monitoring
+        del bpy.types.Scene.flex_capture_rate
         del bpy.types.Scene.captured_shape_keys
     except Exception as e:
         # 抑制删除属性错误的消息
@@ -260,7 +260,7 @@ data = {
         "Remove Vertex Group": "移除顶点组", # Also used as Operator label
         "Remove this vertex group from the list": "从列表中移除此顶点组",
         "Process Vertex Groups": "处理顶点组",
-        "Merge: Merge weights of subsequent groups into the first group.\nEven: Evenly distribute weights of the first group to subsequent groups.\nBisect: Distribute the first group's weight to the 2nd and 3rd groups based on the selected axis or custom line.": "合并: 合并后续组权重到首个组。\n均分: 均分首个组权重给后续组。\n二分: 根据选择的方向或自定义线分配首组权重给第2、3组。",
+        "Merge: Merge weights of subsequent groups into the first group.\nEven: Evenly distribute weights of the first group to subsequent groups.\nBisect: Distribute the first group's weight to the 2nd and 3rd groups based on the selected axis or custom line.\nBand: Distribute the first group's weight across all subsequent groups, ordered from the positive to the negative side.\nSmooth: Smooth the weights of all listed groups over the mesh topology, keeping their per-vertex total.\nLimit: Keep the strongest bone influences per vertex and normalize them to 1.0.\nMirror: Copy or symmetrize the weights of every left/right group pair.": "合并: 合并后续组权重到首个组。\n均分: 均分首个组权重给后续组。\n二分: 根据选择的方向或自定义线分配首组权重给第2、3组。\n分带: 沿分割方向将首组权重分给后续所有组，按从正侧到负侧的顺序排列。\n平滑: 沿网格拓扑平滑列表中所有组的权重，并保持每个顶点的权重总和。\n限制: 保留每个顶点最强的骨骼影响并归一化为1.0。\n镜像: 复制或对称化所有左右成对顶点组的权重。",
         "Target object not set": "未设置目标物体",
         "Target object is invalid or not a mesh object": "目标物体无效或不是网格物体",
         "Please select at least two vertex groups": "请至少选择两个顶点组",
@@ -311,6 +311,161 @@ data = {
         "Split weights along the Y axis": "沿Y轴分割权重", # EnumProperty item description
         "Split weights along the Z axis": "沿Z轴分割权重", # EnumProperty item description
         "Use custom split line": "使用自定义分割线", # EnumProperty item description
+        "Execute Band Split": "执行分带权重",
+        "Live Blend": "实时混合",
+        "Export Weights": "导出权重",
+        "Write all vertex groups of the selected meshes to a compressed .npz file": "将选中网格的所有顶点组写入压缩的 .npz 文件",
+        "Import Weights": "导入权重",
+        "Restore vertex groups of the selected meshes from a .npz weight file, matching meshes by name": "从 .npz 权重文件恢复选中网格的顶点组，按名称匹配网格",
+        "Ignore Topology Check": "忽略拓扑检查",
+        "Import even if the mesh topology differs from the file, as long as the vertex count matches": "只要顶点数一致，即使网格拓扑与文件不同也导入",
+        "Please select at least one mesh object": "请至少选择一个网格物体",
+        "Failed to export weights": "导出权重失败",
+        "Failed to import weights": "导入权重失败",
+        "Topology does not match the weight file, skipped": "拓扑与权重文件不匹配，已跳过",
+        "Exported": "已导出",
+        "Imported": "已导入",
+        "Use Posed Positions": "使用姿态坐标",
+        "Split and distribute weights using vertex positions after pose, shape keys and modifiers": "使用姿态、形态键和修改器作用后的顶点坐标分割和分配权重",
+        "Modifiers change the vertex count, using rest positions": "修改器改变了顶点数量，使用静止坐标",
+        "Surface": "表面",
+        "Split weights by surface distance from two seeds": "按到两个种子的表面距离分割权重",
+        "Seeds": "种子",
+        "Where the surface distance split starts from": "表面距离分割的起点",
+        "Bone Heads": "骨骼头部",
+        "Seed from the mesh vertices nearest to the target bones' heads": "以离目标骨骼头部最近的网格顶点为种子",
+        "Picked Vertices": "点选顶点",
+        "Seed from the vertices picked in order in edit mode": "以编辑模式下依次点选的顶点为种子",
+        "Pick at least": "请至少依次点选",
+        "seed vertices in order": "个种子顶点",
+        "Bone seeds require an armature with bones matching the target groups": "骨骼种子需要骨架中存在与目标组同名的骨骼",
+        "bands along surface distance": "个带，沿表面距离",
+        "Bisect weight completed using surface distance": "已按表面距离完成二分权重",
+        "Mask": "遮罩",
+        "Weight Mask": "权重遮罩",
+        "Restrict vertex group operations to a subset of vertices": "将顶点组操作限制在部分顶点上",
+        "All Vertices": "全部顶点",
+        "Operate on every vertex": "处理所有顶点",
+        "Selected Vertices": "选中顶点",
+        "Operate on the vertices selected in edit mode": "处理编辑模式下选中的顶点",
+        "Mask Group": "遮罩顶点组",
+        "Operate on the vertices weighted in the mask vertex group": "处理遮罩顶点组中有权重的顶点",
+        "Vertex group whose weighted vertices are processed": "其中有权重的顶点会被处理的顶点组",
+        "Operate on the vertices of faces using the material slot": "处理使用该材质槽的面上的顶点",
+        "Material": "材质",
+        "Material Index": "材质索引",
+        "Material slot index whose faces' vertices are processed": "要处理其面上顶点的材质槽索引",
+        "No vertices in the weight mask": "权重遮罩中没有顶点",
+        "Prune Weights": "清理权重",
+        "Remove near-zero weights and the bone vertex groups they empty on all meshes bound to the target object's armature": "移除目标物体骨架绑定的所有网格上接近零的权重，以及因此变空的骨骼顶点组",
+        "Threshold": "阈值",
+        "Weights below this value are removed": "低于该值的权重将被移除",
+        "Remove Empty Groups": "删除空顶点组",
+        "Delete bone vertex groups whose weights were all removed by pruning": "删除权重被本次清理全部移除的骨骼顶点组",
+        "Removed": "已移除",
+        "weight entries": "条权重",
+        "Analyze Bone Budget": "分析骨骼预算",
+        "Count weighted bones per mesh and material, vertices over the influence limit, empty groups and bones without groups": "统计每个网格和材质使用的骨骼数、超出影响数量的顶点、零权重顶点组以及没有顶点组的骨骼",
+        "Export Analysis": "导出分析结果",
+        "Export the last bone budget analysis as JSON": "将最近一次骨骼预算分析导出为 JSON",
+        "Select an armature or a target mesh bound to an armature": "请选择骨架或绑定到骨架的目标网格",
+        "No meshes are bound to the armature": "没有绑定到该骨架的网格",
+        "Run the bone budget analysis first": "请先运行骨骼预算分析",
+        "Failed to export analysis": "导出分析结果失败",
+        "Analysis exported to": "分析结果已导出到",
+        "over limit": "个超出限制",
+        "empty groups": "个空顶点组",
+        "bones without group": "个骨骼没有顶点组",
+        "Slot": "槽位",
+        "Restore Last": "恢复上一步",
+        "Restore the vertex groups touched by the last weight operation on the target object": "恢复目标物体上一次权重操作修改过的顶点组",
+        "Restore Snapshot": "恢复快照",
+        "Restore the target object's vertex groups to the state before the chosen weight operation": "把目标物体的顶点组恢复到所选权重操作之前的状态",
+        "Snapshot": "快照",
+        "Snapshots": "快照数量",
+        "Number of weight snapshots kept per mesh before each vertex group operation (0 disables snapshots)": "每个网格在顶点组操作前保留的权重快照数量（0 为关闭快照）",
+        "No snapshots": "没有快照",
+        "No weight snapshots for the target object": "目标物体没有权重快照",
+        "Snapshot no longer exists": "快照已不存在",
+        "Restored snapshot": "已恢复快照",
+        "Restored": "已恢复",
+        "snapshots": "个快照",
+        "Re-split the last bisect or band split immediately when the blend factor changes": "修改混合因子时立即重新计算上一次的二分或分带权重",
+        "Band split completed with": "分带权重完成，共", # Part of f-string
+        "bands along": "个带，方向", # Part of f-string
+        "bands along custom split line": "个带，沿自定义分割线", # Part of f-string
+        "Smooth Weights": "平滑权重",
+        "Iterations": "迭代次数",
+        "Number of smoothing iterations": "平滑迭代的次数",
+        "Smooth Factor": "平滑系数",
+        "How far each iteration moves a weight towards its neighbours' average": "每次迭代将权重向相邻顶点平均值移动的程度",
+        "Smoothed": "已平滑", # Part of f-string
+        "iterations": "次迭代", # Part of f-string
+        "Mirror Weights": "镜像权重",
+        "Mirror Mode": "镜像模式",
+        "How weights are mirrored between left and right groups": "左右顶点组之间的权重镜像方式",
+        "Left to Right": "左到右",
+        "Rebuild the right groups from the left groups": "根据左侧顶点组重建右侧顶点组",
+        "Right to Left": "右到左",
+        "Rebuild the left groups from the right groups": "根据右侧顶点组重建左侧顶点组",
+        "Symmetrize": "对称化",
+        "Average both sides so they match": "取两侧平均值使其一致",
+        "Mirror Tolerance": "镜像容差",
+        "Maximum distance between a vertex and its mirrored counterpart": "顶点与其镜像顶点之间允许的最大距离",
+        "No left/right vertex group pairs found": "未找到左右成对的顶点组",
+        "Mirrored": "已镜像", # Part of f-string
+        "group pairs": "对顶点组", # Part of f-string
+        "vertices without a mirror": "个顶点没有镜像", # Part of f-string
+        "Transfer Surface Weights": "表面权重传递",
+        "Copy weights from the active mesh to all other selected meshes by interpolating the nearest surface point": "按最近表面点插值，将活动网格的权重复制到其他所有选中的网格",
+        "Select the clothing meshes and make the body mesh active": "请选中服装网格，并将身体网格设为活动物体",
+        "The active mesh has no bone vertex groups": "活动网格没有骨骼顶点组",
+        "The active mesh has no faces to transfer weights from": "活动网格没有可用于传递权重的面",
+        "Transferred weights to": "已传递权重到", # Part of f-string
+        "Chain Projection Weights": "骨骼链投影权重",
+        "Distribute the first group's weight over a bone chain by projecting each vertex onto the bone segments": "将每个顶点投影到骨骼链的各段骨骼上，据此把首个组的权重分配给骨骼链",
+        "Bone Chain": "骨骼链",
+        "Use the bones currently selected on the armature": "使用骨架上当前选中的骨骼",
+        "Skirt Bones": "裙子骨骼",
+        "Use the bones matching the skirt keywords": "使用匹配裙子关键字的骨骼",
+        "Hair Bones": "头发骨骼",
+        "Use the bones matching the hair keywords": "使用匹配头发关键字的骨骼",
+        "Falloff": "衰减",
+        "Distance falloff exponent, higher values keep weights closer to each bone": "距离衰减指数，数值越大权重越集中在骨骼附近",
+        "Could not find the armature bound to the target object": "未找到目标物体绑定的骨架",
+        "No bones found for the selected chain": "未找到所选骨骼链的骨骼",
+        "Projected": "已投影", # Part of f-string
+        "onto": "到", # Part of f-string
+        "Even Transfer Mode": "均分模式",
+        "How the first group's weight is divided among the target groups": "首个组的权重在目标组之间的分配方式",
+        "Even": "平均",
+        "Give every target group the same share": "每个目标组分得相同的权重",
+        "By Bone Distance": "按骨骼距离",
+        "Give closer target bones a larger share": "距离越近的目标骨骼分得越多的权重",
+        "Distance mode requires an armature with bones matching the target groups": "距离模式需要骨架中存在与目标组同名的骨骼",
+        "Limit and Normalize": "限制并归一化",
+        "Max Influences": "最大影响数",
+        "Maximum number of bone influences kept per vertex (StudioMDL uses 3)": "每个顶点保留的最大骨骼影响数量 (StudioMDL 为3)",
+        "All Bound Meshes": "所有绑定网格",
+        "Apply to every mesh bound to the target object's armature instead of only the target object": "作用于目标物体骨架绑定的所有网格，而不仅是目标物体",
+        "Batch mode requires the target object to be bound to an armature": "批量模式需要目标物体绑定到骨架",
+        "vertices changed": "个顶点已修改", # Part of f-string
+        "Batch processed": "批量处理", # Part of f-string
+        "objects": "个物体", # Part of f-string
+        "weight entries removed": "个权重条目已移除", # Part of f-string
+        "vertices exceeded": "个顶点超过", # Part of f-string
+        "influences": "个影响", # Part of f-string
+        "Collapse Custom Weights": "折叠自定义骨骼权重",
+        "Fold the weights of every mapped custom bone into its official bone on all meshes bound to the custom armature": "根据骨骼映射，将自定义骨架绑定的所有网格中自定义骨骼的权重合并到对应的官方骨骼",
+        "Remove Emptied Groups": "移除已清空的顶点组",
+        "Delete the custom vertex groups after their weights are folded": "权重合并后删除自定义顶点组",
+        "Remove Custom Bones": "移除自定义骨骼",
+        "Delete the folded custom bones from the custom armature": "从自定义骨架中删除已合并的自定义骨骼",
+        "Please select the custom armature first": "请先选择自定义骨架",
+        "Folded": "已合并", # Part of f-string
+        "custom groups": "个自定义顶点组", # Part of f-string
+        "vertices": "个顶点", # Part of f-string
+        "removed": "移除", # Part of f-string
 
         # bone_modify.py UI Elements
         "Bone Quick Select": "骨骼快捷选择",
@@ -487,6 +642,11 @@ data = {
         "Selected object is not a mesh model. Please select a mesh model to proceed.": "选中的对象不是网格模型。请选中一个网格模型再进行操作。",
         "No shape key data on the object.": "对象上没有形态键数据。",
         "Please select the expressions to create from the main panel list first": "请先在主面板的列表中选择要创建的表情",
+        "Circular dependency in flex mixes": "表情混合中存在循环依赖",
+        "Missing shape keys": "缺失的形态键",
+        "Cannot create": "无法创建",
+        "Capture Rate": "捕获频率",
+        "Maximum number of shape key captures per second while monitoring": "监测时每秒最多捕获形态键的次数",
         "Batch created": "批量创建了", # f-string part
         "shape keys": "个形态键", # f-string part
         "Tracking information not found. Please create shape keys using the plugin first.": "没有找到跟踪信息，请先使用插件创建形态键。",
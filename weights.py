@@ -1,10 +1,1036 @@
 import bpy
 import os
-from bpy.props import StringProperty, CollectionProperty, PointerProperty, FloatProperty, FloatVectorProperty, BoolProperty
+import time
+import json
+import heapq
+import hashlib
+import zipfile
+import bmesh
+import numpy as np
+from contextlib import contextmanager
+from bpy.props import StringProperty, CollectionProperty, PointerProperty, FloatProperty, FloatVectorProperty, BoolProperty, IntProperty
 from bpy.types import PropertyGroup, Operator, Panel, UIList
-from mathutils import Vector
+from mathutils import Vector, kdtree, bvhtree
 from bpy_extras import view3d_utils
 from bpy.app.translations import pgettext_iface as _
+from bpy.app.handlers import persistent
+from . import bone_modify
+from .resources import bone_dict
+
+# 权重低于该值视为零，以保持顶点组的稀疏性
+WEIGHT_EPSILON = 0.0001
+# 批量写入时的权重量化步长，量化值相同的顶点合并为一次 add 调用
+WEIGHT_QUANT_STEP = 1.0 / 4096
+
+def read_group_weights(obj, group_indices=None, vert_mask=None):
+    """遍历一次网格，读取顶点组成员关系
+
+    返回 (顶点索引, 顶点组索引, 权重) 三个等长数组（稀疏矩阵的 COO 形式）。
+    group_indices 为 None 时读取全部顶点组，vert_mask 为顶点索引数组时只遍历这些顶点。
+    """
+    wanted = None if group_indices is None else set(group_indices)
+    vert_indices = []
+    group_ids = []
+    weights = []
+    vertices = obj.data.vertices
+    for vert in (vertices if vert_mask is None else (vertices[index] for index in vert_mask.tolist())):
+        for group in vert.groups:
+            if wanted is None or group.group in wanted:
+                vert_indices.append(vert.index)
+                group_ids.append(group.group)
+                weights.append(group.weight)
+    return (np.array(vert_indices, dtype=np.int32),
+            np.array(group_ids, dtype=np.int32),
+            np.array(weights, dtype=np.float32))
+
+def write_group_weights(vertex_group, vert_indices, weights, mode='REPLACE', step=WEIGHT_QUANT_STEP):
+    """按量化后的权重值分桶写入顶点组，每个桶只调用一次 add
+
+    step 为 None 时按原始权重值分桶，用于精确恢复。
+    量化为 0 的顶点不会被写入；REPLACE 模式下这些顶点会从顶点组中移除，
+    以免保留旧权重。返回实际写入的顶点数。
+    """
+    if len(vert_indices) == 0:
+        return 0
+    if step is None:
+        buckets = np.asarray(weights, dtype=np.float32)
+    else:
+        buckets = np.rint(np.asarray(weights, dtype=np.float64) / step).astype(np.int32)
+    order = np.argsort(buckets, kind='stable')
+    buckets = buckets[order]
+    vert_indices = np.asarray(vert_indices)[order]
+    values, starts = np.unique(buckets, return_index=True)
+    ends = np.append(starts[1:], len(buckets))
+    written = 0
+    for value, start, end in zip(values.tolist(), starts.tolist(), ends.tolist()):
+        if value <= 0:
+            if mode == 'REPLACE':
+                vertex_group.remove(vert_indices[start:end].tolist())
+            continue
+        weight = value if step is None else value * step
+        vertex_group.add(vert_indices[start:end].tolist(), min(weight, 1.0), mode)
+        written += end - start
+    return written
+
+@contextmanager
+def object_mode(context):
+    """顶点组权重只能在物体模式下写入，处于编辑模式时临时切换到物体模式，结束后恢复"""
+    was_editing = context.mode == 'EDIT_MESH'
+    if was_editing:
+        bpy.ops.object.mode_set(mode='OBJECT')
+    try:
+        yield
+    finally:
+        if was_editing:
+            bpy.ops.object.mode_set(mode='EDIT')
+
+def read_vertex_coords(mesh):
+    """通过 foreach_get 一次性读取所有顶点的局部坐标，返回 (N, 3) 的 float32 数组"""
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', coords)
+    return coords.reshape(-1, 3)
+
+def get_masked_vertices(obj, scene):
+    """按场景中的遮罩设置返回参与运算的顶点索引数组，不使用遮罩时返回 None"""
+    mode = scene.weight_mask_mode
+    if mode == 'SELECTION':
+        if obj.mode == 'EDIT':
+            obj.update_from_editmode()
+        selected = np.empty(len(obj.data.vertices), dtype=bool)
+        obj.data.vertices.foreach_get("select", selected)
+        return np.flatnonzero(selected).astype(np.int32)
+    if mode == 'GROUP':
+        group = obj.vertex_groups.get(scene.weight_mask_group)
+        if group is None:
+            return np.empty(0, dtype=np.int32)
+        vert_indices, group_ids, weights = read_group_weights(obj, [group.index])
+        return vert_indices[weights > WEIGHT_EPSILON]
+    if mode == 'MATERIAL':
+        if len(obj.data.polygons) == 0:
+            return np.empty(0, dtype=np.int32)
+        material_verts, material_ids = read_vertex_materials(obj)
+        return np.unique(material_verts[material_ids == scene.weight_mask_material]).astype(np.int32)
+    return None
+
+# 求值后的顶点坐标缓存 {物体指针: 坐标数组}，依赖图更新该物体时失效
+_evaluated_coords_cache = {}
+
+def read_evaluated_coords(obj, depsgraph):
+    """一次 foreach_get 读取姿态、形态键和修改器作用后的顶点坐标（网格局部空间）
+
+    只有变形类修改器时求值网格与原网格的顶点一一对应；顶点数不同时无法映射回原顶点，返回 None。
+    """
+    key = obj.as_pointer()
+    cached = _evaluated_coords_cache.get(key)
+    if cached is not None:
+        return cached
+    evaluated = obj.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+    try:
+        if len(mesh.vertices) != len(obj.data.vertices):
+            return None
+        coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", coords)
+    finally:
+        evaluated.to_mesh_clear()
+    coords = coords.reshape(-1, 3)
+    _evaluated_coords_cache[key] = coords
+    return coords
+
+@persistent
+def evaluated_coords_depsgraph_handler(scene, depsgraph):
+    """依赖图更新了某个物体（姿态、形态键、修改器或权重变化）时丢弃它的求值坐标"""
+    if not _evaluated_coords_cache:
+        return
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object):
+            _evaluated_coords_cache.pop(update.id.original.as_pointer(), None)
+
+def get_armature_object(obj):
+    """获取网格物体绑定的骨架，优先使用骨架修改器，其次使用父级"""
+    for modifier in obj.modifiers:
+        if modifier.type == 'ARMATURE' and modifier.object:
+            return modifier.object
+    if obj.parent and obj.parent.type == 'ARMATURE':
+        return obj.parent
+    return None
+
+def get_bone_segments(obj, armature, bone_names, posed=False):
+    """返回骨骼的头尾坐标（已转换到网格局部空间），骨骼不存在时返回 None
+
+    posed 为 True 时使用当前姿态，否则使用静止姿态。
+    """
+    to_local = obj.matrix_world.inverted() @ armature.matrix_world
+    bones = armature.pose.bones if posed else armature.data.bones
+    heads = []
+    tails = []
+    for bone_name in bone_names:
+        bone = bones.get(bone_name)
+        if bone is None:
+            return None
+        heads.append(to_local @ (bone.head if posed else bone.head_local))
+        tails.append(to_local @ (bone.tail if posed else bone.tail_local))
+    return np.array(heads, dtype=np.float32), np.array(tails, dtype=np.float32)
+
+def project_points_to_segments(points, heads, tails):
+    """将 (P, 3) 个点投影到 (S, 3) 条线段上
+
+    返回 (参数 t, 距离) 两个 (P, S) 数组，t 已钳制到 [0, 1]。
+    """
+    axes = tails - heads
+    lengths_sq = np.maximum(np.einsum('ij,ij->i', axes, axes), 1e-12)
+    offsets = points[:, None, :] - heads[None, :, :]
+    t = np.clip(np.einsum('psk,sk->ps', offsets, axes) / lengths_sq, 0.0, 1.0)
+    nearest = heads[None, :, :] + t[:, :, None] * axes[None, :, :]
+    distances = np.linalg.norm(points[:, None, :] - nearest, axis=2)
+    return t, distances
+
+def smoothstep(edge0, edge1, x):
+    """向量化的 Smoothstep，edge0 == edge1 时退化为硬分割"""
+    if edge0 == edge1:
+        return (x >= edge0).astype(np.float32)
+    t = np.clip((x - edge0) / (edge1 - edge0), 0.0, 1.0)
+    return (t * t * (3.0 - 2.0 * t)).astype(np.float32)
+
+def bisect_blend_window(distances, blend_factor, clamp_to_range):
+    """根据有符号距离的范围和混合因子计算混合区间 (以 0 为中心线)"""
+    min_distance = float(distances.min())
+    max_distance = float(distances.max())
+    # 如果所有点位置相同或混合因子为0，则等同于硬分割
+    if min_distance == max_distance or blend_factor == 0.0:
+        return 0.0, 0.0
+    half_width = (max_distance - min_distance) * blend_factor * 0.5
+    blend_start = -half_width
+    blend_end = half_width
+    if clamp_to_range:
+        # 钳制混合区域在实际坐标范围内
+        blend_start = max(min_distance, blend_start)
+        blend_end = min(max_distance, blend_end)
+        # 再次检查防止浮点误差导致 start > end
+        if blend_start > blend_end:
+            blend_start = blend_end = 0.0
+    return blend_start, blend_end
+
+def split_by_group(group_ids):
+    """按顶点组索引对条目分组，逐个产出 (顶点组索引, 条目下标数组)"""
+    if len(group_ids) == 0:
+        return
+    order = np.argsort(group_ids, kind='stable')
+    values, starts = np.unique(group_ids[order], return_index=True)
+    for value, entries in zip(values.tolist(), np.split(order, starts[1:])):
+        yield value, entries
+
+def limit_influences(vert_indices, weights, max_influences, vertex_count):
+    """在 CSR 排列下为每个顶点保留权重最大的 max_influences 个条目并归一化
+
+    返回 (归一化后的权重, 保留掩码)，被丢弃条目的新权重为 0。
+    """
+    # 按顶点排序，同一顶点内按权重降序，得到每个条目在行内的名次
+    order = np.lexsort((-weights, vert_indices))
+    counts = np.bincount(vert_indices, minlength=vertex_count)
+    row_starts = np.cumsum(counts) - counts
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order)) - row_starts[vert_indices[order]]
+    keep = ranks < max_influences
+
+    totals = np.bincount(vert_indices[keep], weights=weights[keep], minlength=vertex_count)
+    row_totals = totals[vert_indices]
+    new_weights = np.zeros_like(weights)
+    valid = keep & (row_totals > 0.0)
+    new_weights[valid] = weights[valid] / row_totals[valid]
+    return new_weights.astype(np.float32), keep
+
+def limit_and_normalize_weights(obj, max_influences, group_indices=None, vert_mask=None):
+    """限制网格每个顶点的骨骼影响数量并归一化，结果批量写回
+
+    vert_mask 为顶点索引数组时只处理这些顶点。
+    返回 (超出限制的顶点数, 移除的权重条目数)。
+    """
+    vert_indices, group_ids, weights = read_group_weights(obj, group_indices, vert_mask)
+    if len(vert_indices) == 0:
+        return 0, 0
+    new_weights, keep = limit_influences(vert_indices, weights, max_influences, len(obj.data.vertices))
+    # 只写回数值发生变化的条目
+    changed = keep & (np.abs(new_weights - weights) > WEIGHT_QUANT_STEP * 0.5)
+
+    for group_id, entries in split_by_group(group_ids):
+        group = obj.vertex_groups[group_id]
+        dropped = entries[~keep[entries]]
+        if len(dropped):
+            group.remove(vert_indices[dropped].tolist())
+        updated = entries[changed[entries]]
+        write_group_weights(group, vert_indices[updated], new_weights[updated])
+
+    limited_vertices = len(np.unique(vert_indices[~keep]))
+    return limited_vertices, int(np.count_nonzero(~keep))
+
+# Blender 中每条顶点组权重 (MDeformWeight) 占用的字节数：顶点组索引 + 权重
+DEFORM_WEIGHT_BYTES = 8
+
+def prune_small_weights(obj, threshold, remove_empty_groups):
+    """移除低于阈值的权重，每个顶点组只调用一次 remove，返回 (移除的条目数, 删除的顶点组数)
+
+    remove_empty_groups 只删除本次清理后变空的骨骼顶点组，原本就为空的组和非骨骼组保持不变。
+    """
+    vert_indices, group_ids, weights = read_group_weights(obj)
+    groups_by_index = {group.index: group for group in obj.vertex_groups}
+    emptied_groups = []
+    removed_entries = 0
+
+    for group_id, entries in split_by_group(group_ids):
+        small = weights[entries] < threshold
+        if small.any():
+            groups_by_index[group_id].remove(vert_indices[entries[small]].tolist())
+            removed_entries += int(small.sum())
+            if small.all():
+                emptied_groups.append(group_id)
+
+    removed_groups = 0
+    if remove_empty_groups:
+        deform_ids = set(get_deform_group_indices(obj))
+        for group_id in emptied_groups:
+            if group_id in deform_ids:
+                obj.vertex_groups.remove(groups_by_index[group_id])
+                removed_groups += 1
+    return removed_entries, removed_groups
+
+def collapse_group_weights(obj, source_to_target, vert_mask=None):
+    """一次遍历把多个源顶点组的权重折叠进各自的目标组
+
+    source_to_target 为 {源组名: 目标组名}，缺失的目标组会被新建。
+    vert_mask 为顶点索引数组时只折叠这些顶点上的权重。
+    源组被清空但不会删除，返回受影响的顶点数。
+    """
+    vertex_groups = obj.vertex_groups
+    pairs = []
+    for source_name, target_name in source_to_target.items():
+        if source_name == target_name or source_name not in vertex_groups:
+            continue
+        target = vertex_groups.get(target_name) or vertex_groups.new(name=target_name)
+        pairs.append((vertex_groups[source_name].index, target.index))
+    if not pairs:
+        return 0
+
+    group_count = len(vertex_groups)
+    remap = np.arange(group_count, dtype=np.int32)
+    for source_id, target_id in pairs:
+        remap[source_id] = target_id
+    source_ids = np.array(sorted({source_id for source_id, target_id in pairs}), dtype=np.int32)
+    target_ids = sorted({target_id for source_id, target_id in pairs})
+
+    vert_indices, group_ids, weights = read_group_weights(obj, source_ids.tolist() + target_ids, vert_mask)
+    from_source = np.isin(group_ids, source_ids)
+    if not from_source.any():
+        return 0
+
+    # 以 (顶点, 目标组) 为键累加权重，与逐顶点 ADD 一样钳制到 1.0
+    keys = vert_indices.astype(np.int64) * group_count + remap[group_ids]
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    totals = np.minimum(np.bincount(inverse, weights=weights), 1.0)
+    touched = np.zeros(len(unique_keys), dtype=bool)
+    touched[inverse[from_source]] = True
+    key_verts = (unique_keys[touched] // group_count).astype(np.int32)
+    key_groups = (unique_keys[touched] % group_count).astype(np.int32)
+    totals = totals[touched]
+
+    for group_id, entries in split_by_group(key_groups):
+        write_group_weights(vertex_groups[group_id], key_verts[entries], totals[entries])
+    # 清空源组
+    source_verts = vert_indices[from_source]
+    for group_id, entries in split_by_group(group_ids[from_source]):
+        vertex_groups[group_id].remove(source_verts[entries].tolist())
+    return len(np.unique(source_verts))
+
+def chain_projection_shares(points, heads, tails, falloff, max_influences, parent_columns, chunk_size=16384):
+    """把顶点投影到骨骼链的各条线段上，按投影参数和距离衰减计算每根骨骼分得的比例
+
+    距离衰减给出每条线段的得分；投影参数 t 靠近线段首端时，得分逐渐分给链中的父骨骼，
+    靠近末端时分给子骨骼，关节处两根相邻骨骼各占一半。
+    parent_columns 为每条线段的父线段列号（不在链中时为 -1）。
+    max_influences 可以是每个顶点各自的数量；每个顶点只保留比例最大的这些骨骼并归一化，
+    返回 (P, S) 数组。为控制内存按块处理顶点。
+    """
+    segment_count = len(heads)
+    parent_columns = np.asarray(parent_columns)
+    has_parent = parent_columns >= 0
+    # 交给父骨骼 / 子骨骼的转移矩阵，有多个子骨骼时平均分配
+    to_parent = np.zeros((segment_count, segment_count), dtype=np.float32)
+    to_parent[np.flatnonzero(has_parent), parent_columns[has_parent]] = 1.0
+    to_children = to_parent.T.copy()
+    child_counts = to_children.sum(axis=1)
+    to_children[child_counts > 0] /= child_counts[child_counts > 0, None]
+    head_blend = np.where(has_parent, 0.5, 0.0).astype(np.float32)
+    tail_blend = np.where(child_counts > 0, 0.5, 0.0).astype(np.float32)
+
+    limits = np.broadcast_to(max_influences, len(points))
+    shares = np.zeros((len(points), segment_count), dtype=np.float32)
+    for start in range(0, len(points), chunk_size):
+        stop = start + chunk_size
+        t, distances = project_points_to_segments(points[start:stop], heads, tails)
+        scores = (1.0 / np.maximum(distances, 1e-6) ** falloff).astype(np.float32)
+        to_head = scores * smoothstep(0.5, 0.0, t) * head_blend
+        to_tail = scores * smoothstep(0.5, 1.0, t) * tail_blend
+        scores = scores - to_head - to_tail + to_head @ to_parent + to_tail @ to_children
+        scores = keep_top_columns(scores, limits[start:stop])
+        shares[start:stop] = scores / scores.sum(axis=1, keepdims=True)
+    return shares
+
+def chain_parent_columns(armature, bone_names):
+    """返回骨骼链中每根骨骼的父骨骼所在列号，父骨骼不在链中时为 -1"""
+    column_of = {name: column for column, name in enumerate(bone_names)}
+    bones = armature.data.bones
+    return np.array([column_of.get(bones[name].parent.name, -1) if bones[name].parent else -1
+                     for name in bone_names], dtype=np.int64)
+
+def keep_top_columns(matrix, count):
+    """每行只保留数值最大的 count 个条目，其余置零；count 也可以是每行各自数量的数组"""
+    if np.ndim(count) > 0:
+        ranks = np.argsort(np.argsort(-matrix, axis=1, kind='stable'), axis=1)
+        return np.where(ranks < np.asarray(count)[:, None], matrix, 0.0).astype(matrix.dtype)
+    if count >= matrix.shape[1]:
+        return matrix
+    top = np.argpartition(-matrix, count - 1, axis=1)[:, :count]
+    rows = np.arange(len(matrix))[:, None]
+    limited = np.zeros_like(matrix)
+    limited[rows, top] = matrix[rows, top]
+    return limited
+
+# 表面 BVH 缓存 {网格指针: (签名, (BVH 树, 三角形顶点索引, 顶点坐标))}
+_bvh_cache = {}
+_BVH_CACHE_SIZE = 4
+
+def get_surface_bvh(mesh):
+    """用网格的三角面构建局部空间 BVH，按网格缓存，顶点坐标或三角面改变时重建"""
+    coords = read_vertex_coords(mesh)
+    mesh.calc_loop_triangles()
+    triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', triangles)
+    triangles = triangles.reshape(-1, 3)
+
+    key = mesh.as_pointer()
+    signature = (len(coords), len(triangles), hash(coords.tobytes()), hash(triangles.tobytes()))
+    cached = _bvh_cache.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    tree = bvhtree.BVHTree.FromPolygons(coords.tolist(), triangles.tolist())
+    if len(_bvh_cache) >= _BVH_CACHE_SIZE:
+        _bvh_cache.pop(next(iter(_bvh_cache)))
+    _bvh_cache[key] = (signature, (tree, triangles, coords))
+    return tree, triangles, coords
+
+def barycentric_coords(points, a, b, c):
+    """向量化计算点在三角形 (a, b, c) 上的重心坐标，返回 (P, 3)"""
+    v0 = b - a
+    v1 = c - a
+    v2 = points - a
+    d00 = np.einsum('ij,ij->i', v0, v0)
+    d01 = np.einsum('ij,ij->i', v0, v1)
+    d11 = np.einsum('ij,ij->i', v1, v1)
+    d20 = np.einsum('ij,ij->i', v2, v0)
+    d21 = np.einsum('ij,ij->i', v2, v1)
+    denominator = d00 * d11 - d01 * d01
+    degenerate = np.abs(denominator) < 1e-12
+    denominator[degenerate] = 1.0
+    v = (d11 * d20 - d01 * d21) / denominator
+    w = (d00 * d21 - d01 * d20) / denominator
+    u = 1.0 - v - w
+    bary = np.clip(np.stack((u, v, w), axis=1), 0.0, 1.0)
+    # 退化三角形直接使用第一个顶点
+    bary[degenerate] = (1.0, 0.0, 0.0)
+    return bary / np.maximum(bary.sum(axis=1, keepdims=True), 1e-12)
+
+def transform_coords(matrix, coords):
+    """用 4x4 矩阵批量变换 (N, 3) 坐标"""
+    matrix = np.array(matrix, dtype=np.float64)
+    return coords @ matrix[:3, :3].T + matrix[:3, 3]
+
+def find_chain_bones(armature, chain_source):
+    """按来源返回骨骼链：选中的骨骼，或按裙子/头发关键字匹配的非映射骨骼"""
+    if chain_source == 'SELECTED':
+        return [bone.name for bone in armature.data.bones if bone.select]
+    keywords = bone_dict.skirt_list if chain_source == 'SKIRT' else bone_dict.hair_list
+    excluded_bones = set(bone_dict.bone_mapping.keys())
+    for bone_list in bone_dict.bone_mapping.values():
+        excluded_bones.update(bone_list)
+    return [bone.name for bone in armature.data.bones
+            if bone.name not in excluded_bones and any(keyword.lower() in bone.name.lower() for keyword in keywords)]
+
+# 网格顶点邻接缓存 {网格指针: ((顶点数, 边数, 边哈希), 邻接数据)}
+_adjacency_cache = {}
+_ADJACENCY_CACHE_SIZE = 16
+
+def get_vertex_adjacency(mesh):
+    """通过 edges.foreach_get 构建顶点邻接表 (CSR)，按网格缓存，顶点或边的连接关系变化时重建
+
+    返回 (rows, cols, indptr)：rows 已排序，cols 为对应的相邻顶点。
+    """
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edges)
+    # 旋转边等编辑不改变顶点数和边数，因此按边的哈希判断缓存是否有效
+    key = mesh.as_pointer()
+    signature = (len(mesh.vertices), len(mesh.edges), hash(edges.tobytes()))
+    cached = _adjacency_cache.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    edges = edges.reshape(-1, 2)
+    rows = np.concatenate((edges[:, 0], edges[:, 1]))
+    cols = np.concatenate((edges[:, 1], edges[:, 0]))
+    order = np.argsort(rows, kind='stable')
+    rows = rows[order]
+    cols = cols[order]
+    indptr = np.zeros(len(mesh.vertices) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(mesh.vertices)), out=indptr[1:])
+
+    if len(_adjacency_cache) >= _ADJACENCY_CACHE_SIZE:
+        _adjacency_cache.pop(next(iter(_adjacency_cache)))
+    _adjacency_cache[key] = (signature, (rows, cols, indptr))
+    return rows, cols, indptr
+
+def smooth_weight_matrix(weights, adjacency, iterations, factor):
+    """对 (V, G) 权重矩阵做 K 次拉普拉斯平滑，每次为一次稀疏矩阵-向量乘"""
+    rows, cols, indptr = adjacency
+    degrees = np.diff(indptr)
+    isolated = degrees == 0
+    inverse_degrees = 1.0 / np.maximum(degrees, 1)
+    vertex_count = len(weights)
+    for iteration in range(iterations):
+        neighbor_mean = np.empty_like(weights)
+        for column in range(weights.shape[1]):
+            neighbor_mean[:, column] = np.bincount(rows, weights=weights[cols, column], minlength=vertex_count) * inverse_degrees
+        neighbor_mean[isolated] = weights[isolated]
+        weights = (1.0 - factor) * weights + factor * neighbor_mean
+    return weights
+
+# 镜像顶点映射缓存 {网格指针: (签名, 镜像索引)}
+_mirror_cache = {}
+
+def get_mirror_index(mesh, tolerance):
+    """返回每个顶点沿局部 X 轴镜像后对应的顶点索引，找不到时为 -1
+
+    先用网格哈希对量化坐标做向量化匹配，剩余顶点再用 KD 树在容差内查找。
+    结果按网格缓存，坐标或容差改变时重建。
+    """
+    coords = read_vertex_coords(mesh)
+    key = mesh.as_pointer()
+    signature = (len(coords), tolerance, hash(coords.tobytes()))
+    cached = _mirror_cache.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    vertex_count = len(coords)
+    grid = np.rint(coords / tolerance).astype(np.int64)
+    mirrored_grid = grid * np.array((-1, 1, 1), dtype=np.int64)
+    cells, labels = np.unique(np.concatenate((grid, mirrored_grid)), axis=0, return_inverse=True)
+    labels = labels.reshape(-1)
+    vertex_of_cell = np.full(len(cells), -1, dtype=np.int64)
+    vertex_of_cell[labels[:vertex_count]] = np.arange(vertex_count)
+    mirror_index = vertex_of_cell[labels[vertex_count:]]
+
+    unmatched = np.flatnonzero(mirror_index < 0)
+    if len(unmatched):
+        tree = kdtree.KDTree(vertex_count)
+        for index, co in enumerate(coords.tolist()):
+            tree.insert(co, index)
+        tree.balance()
+        for index, (x, y, z) in zip(unmatched.tolist(), coords[unmatched].tolist()):
+            found_co, found_index, distance = tree.find((-x, y, z))
+            if found_index is not None and distance <= tolerance:
+                mirror_index[index] = found_index
+
+    if len(_mirror_cache) >= _ADJACENCY_CACHE_SIZE:
+        _mirror_cache.pop(next(iter(_mirror_cache)))
+    _mirror_cache[key] = (signature, mirror_index)
+    return mirror_index
+
+def get_mirror_group_pairs(obj):
+    """按官方骨骼的 _L_/_R_ 命名返回网格上成对存在的顶点组 [(左组名, 右组名)]"""
+    pairs = []
+    for group in obj.vertex_groups:
+        if '_L_' in group.name:
+            right_name = group.name.replace('_L_', '_R_')
+            if right_name in obj.vertex_groups:
+                pairs.append((group.name, right_name))
+    return pairs
+
+def get_deform_group_indices(obj):
+    """返回与骨架中骨骼同名的顶点组索引，没有绑定骨架时返回全部顶点组"""
+    armature = get_armature_object(obj)
+    if armature is None:
+        return [group.index for group in obj.vertex_groups]
+    bones = armature.data.bones
+    return [group.index for group in obj.vertex_groups if group.name in bones]
+
+def build_group_name_index(mesh_objects):
+    """为多个网格一次性建立 {物体名: {顶点组名: 索引}} 的查找表"""
+    return {obj.name: {group.name: group.index for group in obj.vertex_groups} for obj in mesh_objects}
+
+def get_related_mesh_objects(armature):
+    """获取与骨架关联的所有网格物体，使用缓存的骨架→网格索引"""
+    return bone_modify.get_armature_meshes(armature)
+
+def geodesic_distances(coords, adjacency, allowed, sources):
+    """多源 Dijkstra：只在允许的顶点构成的子图上沿网格边计算到最近源点的表面距离
+
+    先用 NumPy 从缓存的邻接表中截取子图并计算边长，再用二叉堆遍历。
+    返回每个顶点的距离，不可达的顶点为 inf。
+    """
+    rows, cols, indptr = adjacency
+    edge_mask = allowed[rows] & allowed[cols]
+    sub_rows = rows[edge_mask]
+    sub_cols = cols[edge_mask]
+    # 子图使用局部索引，便于转换为 Python 列表后快速访问
+    local_of = np.full(len(allowed), -1, dtype=np.int64)
+    subset = np.flatnonzero(allowed)
+    local_of[subset] = np.arange(len(subset))
+    sub_indptr = np.zeros(len(subset) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(local_of[sub_rows], minlength=len(subset)), out=sub_indptr[1:])
+    lengths = np.linalg.norm(coords[sub_cols] - coords[sub_rows], axis=1).tolist()
+    neighbors = local_of[sub_cols].tolist()
+    starts = sub_indptr.tolist()
+
+    local_distances = [float('inf')] * len(subset)
+    heap = []
+    for source in set(local_of[np.asarray(sources)].tolist()):
+        if source >= 0:
+            local_distances[source] = 0.0
+            heap.append((0.0, source))
+    heapq.heapify(heap)
+    while heap:
+        distance, vertex = heapq.heappop(heap)
+        if distance > local_distances[vertex]:
+            continue
+        for edge in range(starts[vertex], starts[vertex + 1]):
+            neighbor = neighbors[edge]
+            candidate = distance + lengths[edge]
+            if candidate < local_distances[neighbor]:
+                local_distances[neighbor] = candidate
+                heapq.heappush(heap, (candidate, neighbor))
+
+    distances = np.full(len(allowed), np.inf)
+    distances[subset] = local_distances
+    return distances
+
+def geodesic_bisect_field(first, second):
+    """由到两个种子的表面距离构建有符号距离，靠近第一个种子为正，等距处为 0
+
+    只能到达一个种子的顶点放在该侧最远处，两个种子都无法到达的顶点放在中线上。
+    """
+    reachable = np.isfinite(first) & np.isfinite(second)
+    field = np.zeros(len(first), dtype=np.float64)
+    field[reachable] = (second[reachable] - first[reachable]) * 0.5
+    extent = float(np.abs(field).max()) + 1.0 if reachable.any() else 1.0
+    field[np.isfinite(first) & ~np.isfinite(second)] = extent
+    field[~np.isfinite(first) & np.isfinite(second)] = -extent
+    return field
+
+def split_blend_windows(distances, band_count, blend_factor, clamp_to_range):
+    """计算 N 个带之间 N-1 条分界线的混合区间，按距离升序排列
+
+    两个带时与二分权重一致 (以 0 为中心线)，更多带时分界线在距离范围内均匀分布，
+    混合区间半宽为带宽乘以混合因子，相邻带之间平滑过渡。
+    """
+    if band_count == 2:
+        return [bisect_blend_window(distances, blend_factor, clamp_to_range)]
+    min_distance = float(distances.min())
+    max_distance = float(distances.max())
+    band_width = (max_distance - min_distance) / band_count
+    half_width = band_width * blend_factor
+    windows = []
+    for k in range(1, band_count):
+        boundary = min_distance + band_width * k
+        windows.append((boundary - half_width, boundary + half_width))
+    return windows
+
+def band_memberships(distances, windows):
+    """按升序的混合区间计算各带隶属度，返回 (P, N) 数组
+
+    第 0 列对应距离最大（正侧）的一端，每行之和为 1。
+    """
+    rising = [smoothstep(start, end, distances) for start, end in windows]
+    columns = [rising[-1]]
+    for k in range(len(rising) - 1, 0, -1):
+        columns.append(np.maximum(rising[k - 1] - rising[k], 0.0))
+    columns.append(1.0 - rising[0])
+    return np.stack(columns, axis=1).astype(np.float32)
+
+# 权重数据文件的格式版本
+WEIGHT_DATA_VERSION = 1
+
+def mesh_topology_hash(mesh):
+    """由顶点数和每个面的顶点索引计算拓扑哈希，用于确认权重文件与网格匹配"""
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+    digest = hashlib.sha1(np.int64(len(mesh.vertices)).tobytes())
+    digest.update(loop_totals.tobytes())
+    digest.update(loop_verts.tobytes())
+    return digest.hexdigest()
+
+def write_npz_array(archive, name, array):
+    """把单个数组写入 npz 压缩包，写完即释放，不需要同时保留所有网格的数据"""
+    with archive.open(f"{name}.npy", 'w', force_zip64=True) as f:
+        np.lib.format.write_array(f, np.asanyarray(array), allow_pickle=False)
+
+def export_mesh_weights(archive, prefix, obj):
+    """一次遍历读取网格的全部顶点组，按顶点组排序为 CSR 后写入压缩包，返回权重条目数"""
+    group_names = [group.name for group in obj.vertex_groups]
+    vert_indices, group_ids, weights = read_group_weights(obj)
+    order = np.lexsort((vert_indices, group_ids))
+    indptr = np.zeros(len(group_names) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(group_ids, minlength=len(group_names)), out=indptr[1:])
+
+    write_npz_array(archive, f"{prefix}name", np.array(obj.name))
+    write_npz_array(archive, f"{prefix}groups", np.array(group_names, dtype=str))
+    write_npz_array(archive, f"{prefix}indptr", indptr)
+    write_npz_array(archive, f"{prefix}indices", vert_indices[order])
+    write_npz_array(archive, f"{prefix}weights", weights[order])
+    write_npz_array(archive, f"{prefix}vertex_count", np.int64(len(obj.data.vertices)))
+    write_npz_array(archive, f"{prefix}hash", np.array(mesh_topology_hash(obj.data)))
+    return len(vert_indices)
+
+def import_mesh_weights(data, prefix, obj):
+    """把压缩包中一个网格的权重写回顶点组：文件中的组先清空再按权重桶批量写入，返回权重条目数"""
+    group_names = data[f"{prefix}groups"].tolist()
+    indptr = data[f"{prefix}indptr"]
+    indices = data[f"{prefix}indices"]
+    weights = data[f"{prefix}weights"]
+    all_indices = list(range(len(obj.data.vertices)))
+    for column, group_name in enumerate(group_names):
+        group = obj.vertex_groups.get(group_name)
+        if group is None:
+            group = obj.vertex_groups.new(name=group_name)
+        else:
+            group.remove(all_indices)
+        start, end = int(indptr[column]), int(indptr[column + 1])
+        write_group_weights(group, indices[start:end], weights[start:end], step=None)
+    return len(indices)
+
+class SplitCacheEntry:
+    """缓存一次分割所需的原始数据，修改混合因子时无需重新遍历网格"""
+    def __init__(self, key, middle_name, target_names, vert_indices, weights, distances, clamp_to_range,
+                 target_weights, target_present):
+        self.key = key
+        self.middle_name = middle_name
+        self.target_names = target_names
+        self.vert_indices = vert_indices        # 中间组的原始顶点索引
+        self.weights = weights                  # 中间组的原始权重
+        self.distances = distances              # 每个顶点到分割平面的有符号距离
+        self.clamp_to_range = clamp_to_range
+        self.target_weights = target_weights    # 分割前目标组在这些顶点上的权重 (T, P)
+        self.target_present = target_present    # 分割前这些顶点是否属于目标组 (T, P)
+        self.applied = False
+
+# 分割缓存 {网格指针: SplitCacheEntry}
+_split_cache = {}
+
+def split_cache_key(middle_name, target_names, field_key, vert_mask=None):
+    """以中间组、目标组、距离场参数和顶点遮罩作为缓存键"""
+    mask_key = None if vert_mask is None else (len(vert_mask), hash(vert_mask.tobytes()))
+    return (middle_name, tuple(target_names), field_key, mask_key)
+
+def coords_field_key(coords):
+    """距离场所用顶点坐标的签名，重新摆姿态或编辑网格后缓存键随之改变"""
+    return len(coords), hash(coords.tobytes())
+
+def plane_field_key(plane_normal, plane_d):
+    """分割平面对应的距离场参数"""
+    normal_key = tuple(round(float(value), 6) for value in plane_normal)
+    plane_key = None if plane_d is None else round(float(plane_d), 6)
+    return normal_key, plane_key
+
+def plane_distances(coords, vert_indices, plane_normal, plane_d):
+    """计算顶点到分割平面的有符号距离，plane_d 为 None 时平面穿过这些顶点的平均位置"""
+    coords = coords[vert_indices].astype(np.float64)
+    distances = coords @ np.asarray(plane_normal, dtype=np.float64)
+    if plane_d is None:
+        distances -= distances.mean()
+    else:
+        distances += plane_d
+    return distances
+
+def invalidate_split_cache(obj):
+    """网格权重被其他操作修改后，丢弃该网格的分割缓存"""
+    _split_cache.pop(obj.data.as_pointer(), None)
+
+def get_applied_split(obj, key=None):
+    """返回网格上仍然有效的已应用分割缓存
+
+    通过检查首个顶点是否已回到中间组来识别撤销等外部修改。
+    """
+    entry = _split_cache.get(obj.data.as_pointer())
+    if entry is None or not entry.applied or (key is not None and entry.key != key):
+        return None
+    middle_group = obj.vertex_groups.get(entry.middle_name)
+    if middle_group is None or not all(name in obj.vertex_groups for name in entry.target_names):
+        return None
+    try:
+        middle_group.weight(int(entry.vert_indices[0]))
+        return None
+    except RuntimeError:
+        return entry
+
+def build_split_entry(obj, key, middle_name, target_names, distances_of, clamp_to_range, vert_mask=None):
+    """一次遍历读取中间组和目标组的权重并计算有符号距离，没有受影响顶点时返回 None
+
+    distances_of 接收受影响顶点的索引数组，返回它们的有符号距离。
+    """
+    middle_id = obj.vertex_groups[middle_name].index
+    target_ids = [obj.vertex_groups[name].index for name in target_names]
+    vert_indices, group_ids, weights = read_group_weights(obj, [middle_id] + target_ids, vert_mask)
+
+    # 收集受影响顶点及其权重，忽略极小权重
+    in_middle = (group_ids == middle_id) & (weights > WEIGHT_EPSILON)
+    middle_indices = vert_indices[in_middle]
+    middle_weights = weights[in_middle]
+    if len(middle_indices) == 0:
+        return None
+
+    # 记录目标组在受影响顶点上的原有权重，用于恢复
+    row_of = np.full(len(obj.data.vertices), -1, dtype=np.int64)
+    row_of[middle_indices] = np.arange(len(middle_indices))
+    target_weights = np.zeros((len(target_ids), len(middle_indices)), dtype=np.float32)
+    target_present = np.zeros((len(target_ids), len(middle_indices)), dtype=bool)
+    for column, target_id in enumerate(target_ids):
+        entries = (group_ids == target_id) & (row_of[vert_indices] >= 0)
+        rows = row_of[vert_indices[entries]]
+        target_weights[column, rows] = weights[entries]
+        target_present[column, rows] = True
+
+    return SplitCacheEntry(key, middle_name, list(target_names), middle_indices, middle_weights,
+                           distances_of(middle_indices), clamp_to_range, target_weights, target_present)
+
+def restore_split_entry(obj, entry):
+    """把中间组和目标组恢复到缓存中记录的分割前状态
+
+    按原始权重值写入（不量化），反复重新混合也不会偏离原始权重。
+    """
+    middle_group = obj.vertex_groups[entry.middle_name]
+    write_group_weights(middle_group, entry.vert_indices, entry.weights, step=None)
+    for row, target_name in enumerate(entry.target_names):
+        group = obj.vertex_groups[target_name]
+        present = entry.target_present[row]
+        absent_indices = entry.vert_indices[~present]
+        if len(absent_indices):
+            group.remove(absent_indices.tolist())
+        write_group_weights(group, entry.vert_indices[present], entry.target_weights[row][present], step=None)
+    entry.applied = False
+
+def apply_split_entry(obj, entry, blend_factor):
+    """用缓存的距离计算各带隶属度，移除中间组并批量写入各目标组"""
+    windows = split_blend_windows(entry.distances, len(entry.target_names), blend_factor, entry.clamp_to_range)
+    memberships = band_memberships(entry.distances, windows)
+
+    obj.vertex_groups[entry.middle_name].remove(entry.vert_indices.tolist())
+    for column, target_name in enumerate(entry.target_names):
+        band_weights = entry.weights * memberships[:, column]
+        keep = band_weights > WEIGHT_EPSILON # 忽略极小的权重以保持稀疏性
+        write_group_weights(obj.vertex_groups[target_name], entry.vert_indices[keep], band_weights[keep], 'ADD')
+    entry.applied = True
+
+def update_blend_factor(self, context):
+    """开启实时混合时，修改混合因子会基于缓存立即重新分割上一次的结果"""
+    if not getattr(self, "live_blend", False) or not self.target_mesh_object:
+        return
+    obj = bpy.data.objects.get(self.target_mesh_object)
+    if not obj or obj.type != 'MESH':
+        return
+    entry = get_applied_split(obj)
+    if entry is None:
+        return
+    # 编辑模式下无法写入顶点组，与执行操作时一样临时切换到物体模式
+    was_editing = obj.mode == 'EDIT'
+    if was_editing:
+        bpy.ops.object.mode_set(mode='OBJECT')
+    try:
+        restore_split_entry(obj, entry)
+        apply_split_entry(obj, entry, self.blend_factor)
+        obj.data.update()
+    finally:
+        if was_editing:
+            bpy.ops.object.mode_set(mode='EDIT')
+
+class WeightSnapshot:
+    """一次顶点组操作之前受影响顶点组的紧凑副本"""
+    def __init__(self, serial, label, groups, all_group_names, vert_mask=None):
+        self.serial = serial
+        self.label = label
+        self.groups = groups                    # {顶点组名称: (int32 顶点索引, float32 权重)}
+        self.all_group_names = all_group_names  # 覆盖全部顶点组时记录当时存在的组名，否则为 None
+        self.vert_mask = vert_mask              # 只记录了部分顶点时为这些顶点的索引，否则为 None
+        self.nbytes = sum(indices.nbytes + weights.nbytes for indices, weights in groups.values()) + \
+            (0 if vert_mask is None else vert_mask.nbytes)
+
+# 权重快照 {网格指针: [WeightSnapshot, ...]}，按时间从旧到新排列
+_weight_snapshots = {}
+_snapshot_serial = 0
+# 所有网格快照占用内存的上限
+SNAPSHOT_MEMORY_LIMIT = 64 * 1024 * 1024
+
+def take_weight_snapshot(obj, label, group_names, max_snapshots, vert_mask=None):
+    """一次遍历读取指定顶点组并保存为快照，group_names 为空时保存全部顶点组
+
+    vert_mask 为顶点索引数组时只记录这些顶点，恢复时也只改写这些顶点。
+    """
+    global _snapshot_serial
+    if max_snapshots <= 0:
+        return None
+    full = not group_names
+    groups = list(obj.vertex_groups) if full else \
+        [obj.vertex_groups[name] for name in dict.fromkeys(group_names) if name in obj.vertex_groups]
+    index_to_name = {group.index: group.name for group in groups}
+    vert_indices, group_ids, weights = read_group_weights(obj, list(index_to_name), vert_mask)
+
+    snapshot_groups = {name: (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+                       for name in index_to_name.values()}
+    for group_id, entries in split_by_group(group_ids):
+        snapshot_groups[index_to_name[group_id]] = (vert_indices[entries], weights[entries])
+
+    _snapshot_serial += 1
+    snapshot = WeightSnapshot(_snapshot_serial, label, snapshot_groups,
+                              [group.name for group in groups] if full else None, vert_mask)
+    history = _weight_snapshots.setdefault(obj.data.as_pointer(), [])
+    history.append(snapshot)
+    del history[:-max_snapshots]
+    evict_weight_snapshots()
+    return snapshot
+
+def evict_weight_snapshots():
+    """总内存超过上限时，从所有网格中最旧的快照开始丢弃，始终保留最新的一个快照"""
+    histories = [history for history in _weight_snapshots.values() if history]
+    total = sum(snapshot.nbytes for history in histories for snapshot in history)
+    while total > SNAPSHOT_MEMORY_LIMIT and sum(len(history) for history in histories) > 1:
+        oldest = min((history for history in histories if history), key=lambda history: history[0].serial)
+        total -= oldest.pop(0).nbytes
+    for pointer in [key for key, history in _weight_snapshots.items() if not history]:
+        del _weight_snapshots[pointer]
+
+def get_weight_snapshots(obj):
+    """返回网格的快照列表，按时间从旧到新排列"""
+    return _weight_snapshots.get(obj.data.as_pointer(), [])
+
+def restore_weight_snapshot(obj, snapshot):
+    """用快照中的权重替换对应顶点组，清空和写入都是批量操作"""
+    all_indices = list(range(len(obj.data.vertices))) if snapshot.vert_mask is None else snapshot.vert_mask.tolist()
+    if snapshot.all_group_names is not None:
+        # 删除快照之后新建的顶点组
+        kept = set(snapshot.all_group_names)
+        for group in [group for group in obj.vertex_groups if group.name not in kept]:
+            obj.vertex_groups.remove(group)
+    for name, (indices, weights) in snapshot.groups.items():
+        group = obj.vertex_groups.get(name)
+        if group is None:
+            group = obj.vertex_groups.new(name=name)
+        else:
+            group.remove(all_indices)
+        write_group_weights(group, indices, weights, step=None)
+
+def restore_to_snapshot(obj, serial):
+    """从最新的快照依次恢复到指定快照，并丢弃这些快照，返回恢复的快照数"""
+    history = get_weight_snapshots(obj)
+    position = next((i for i, snapshot in enumerate(history) if snapshot.serial == serial), None)
+    if position is None:
+        return 0
+    for snapshot in reversed(history[position:]):
+        restore_weight_snapshot(obj, snapshot)
+    restored = len(history) - position
+    del history[position:]
+    invalidate_split_cache(obj)
+    obj.data.update()
+    return restored
+
+_snapshot_enum_items = []
+
+def get_snapshot_items(self, context):
+    """当前目标网格的快照列表，最新的在最前"""
+    # 动态枚举项必须保持引用，否则界面上会显示乱码
+    _snapshot_enum_items.clear()
+    obj = bpy.data.objects.get(context.scene.target_mesh_object) if context.scene.target_mesh_object else None
+    if obj and obj.type == 'MESH':
+        for snapshot in reversed(get_weight_snapshots(obj)):
+            _snapshot_enum_items.append((str(snapshot.serial), snapshot.label,
+                                         f"{len(snapshot.groups)} {_('vertex groups')}"))
+    if not _snapshot_enum_items:
+        _snapshot_enum_items.append(('NONE', _("No snapshots"), ""))
+    return _snapshot_enum_items
+
+# StudioMDL 单个模型允许的最大骨骼数 (MAXSTUDIOBONES)
+STUDIOMDL_MAX_BONES = 128
+
+# 最近一次骨骼预算分析的结果，用于导出 JSON
+_last_analysis = {}
+
+def read_vertex_materials(obj):
+    """返回 (顶点索引, 材质索引) 对，表示每个顶点被哪些材质的面使用"""
+    mesh = obj.data
+    polygon_count = len(mesh.polygons)
+    material_indices = np.empty(polygon_count, dtype=np.int32)
+    loop_totals = np.empty(polygon_count, dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", material_indices)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+    loop_materials = np.repeat(material_indices, loop_totals)
+    # 去掉同一材质内重复的顶点
+    pairs = np.unique(loop_materials.astype(np.int64) * len(mesh.vertices) + loop_verts)
+    return pairs % len(mesh.vertices), pairs // len(mesh.vertices)
+
+def analyze_mesh_weights(obj, bone_names, max_influences):
+    """一次遍历构建顶点×顶点组稀疏矩阵，统计骨骼数量、超出影响数量的顶点和零权重顶点组"""
+    vertex_count = len(obj.data.vertices)
+    group_names = [group.name for group in obj.vertex_groups]
+    bone_group_ids = np.array([group.index for group in obj.vertex_groups if group.name in bone_names], dtype=np.int32)
+    vert_indices, group_ids, weights = read_group_weights(obj)
+
+    # 只统计骨骼顶点组中的非零权重
+    weighted = np.isin(group_ids, bone_group_ids) & (weights > WEIGHT_EPSILON)
+    influences = np.bincount(vert_indices[weighted], minlength=vertex_count)
+    totals = np.bincount(group_ids, weights=weights, minlength=len(group_names))
+    weighted_ids = np.unique(group_ids[weighted])
+
+    materials = []
+    if len(obj.data.polygons) and vertex_count:
+        material_verts, material_ids = read_vertex_materials(obj)
+        vertex_used = np.zeros(vertex_count, dtype=bool)
+        for material_index in np.unique(material_ids).tolist():
+            vertex_used[:] = False
+            vertex_used[material_verts[material_ids == material_index]] = True
+            in_material = weighted & vertex_used[vert_indices]
+            slot = obj.material_slots[material_index] if material_index < len(obj.material_slots) else None
+            materials.append({
+                "name": slot.material.name if slot and slot.material else f"{_('Slot')} {material_index}",
+                "weighted_bones": int(len(np.unique(group_ids[in_material]))),
+                "over_limit": int((np.bincount(vert_indices[in_material], minlength=vertex_count) > max_influences).sum()),
+            })
+
+    return {
+        "name": obj.name,
+        "vertex_count": vertex_count,
+        "weighted_bones": [group_names[index] for index in weighted_ids.tolist()],
+        "over_limit": int((influences > max_influences).sum()),
+        "max_found": int(influences.max()) if vertex_count else 0,
+        "zero_weight_groups": [group_names[index] for index in bone_group_ids.tolist() if totals[index] <= WEIGHT_EPSILON],
+        "materials": materials,
+    }
+
+def analyze_weight_budget(armature, mesh_objects, max_influences):
+    """分析骨架绑定的所有网格，返回可直接导出为 JSON 的结果"""
+    bone_names = set(armature.data.bones.keys())
+    meshes = [analyze_mesh_weights(obj, bone_names, max_influences) for obj in mesh_objects]
+    weighted_bones = sorted(set().union(*(mesh["weighted_bones"] for mesh in meshes)))
+    grouped_bones = set().union(*({group.name for group in obj.vertex_groups} for obj in mesh_objects))
+    return {
+        "armature": armature.name,
+        "max_influences": max_influences,
+        "bone_limit": STUDIOMDL_MAX_BONES,
+        "bone_count": len(weighted_bones),
+        "weighted_bones": weighted_bones,
+        "bones_without_group": sorted(bone.name for bone in armature.data.bones
+                                      if bone.use_deform and bone.name not in grouped_bones),
+        "meshes": meshes,
+    }
 
 class VertexGroupItem(PropertyGroup):
     name: StringProperty(name=_("Vertex Group Name"), description=_("The name of the vertex group"))
@@ -62,14 +1088,29 @@ class L4D2_PT_WeightsPanel(Panel):
             
             # 显示已添加的顶点组列表
             layout.template_list("L4D2_UL_VertexGroups", "", scene, "vertex_group_names", scene, "active_vertex_group_index", rows=3)
+            options_row = layout.row()
+            options_row.prop(scene, "process_all_meshes")
+            options_row.prop(scene, "use_evaluated_positions")
+            mask_row = layout.row(align=True)
+            mask_row.prop(scene, "weight_mask_mode", text=_("Mask"))
+            mask_obj = bpy.data.objects.get(scene.target_mesh_object) if scene.target_mesh_object else None
+            if scene.weight_mask_mode == 'GROUP' and mask_obj:
+                mask_row.prop_search(scene, "weight_mask_group", mask_obj, "vertex_groups", text="")
+            elif scene.weight_mask_mode == 'MATERIAL':
+                mask_row.prop(scene, "weight_mask_material", text="")
             
             # 权重处理按钮
             if len(scene.vertex_group_names) > 0:
                 # 将两个按钮分开为两列
                 row1 = layout.row()
                 row1.operator("l4d2.process_vertex_groups", text=_("Merge Vertex Groups")).operation = 'MERGE'
-                row2 = layout.row()
+                row2 = layout.row(align=True)
                 row2.operator("l4d2.process_vertex_groups", text=_("Even Weight Transfer")).operation = 'EVEN_WEIGHT_TRANSFER'
+                row2.prop(scene, "even_transfer_mode", text="")
+                row3 = layout.row(align=True)
+                row3.operator("l4d2.process_vertex_groups", text=_("Smooth Weights")).operation = 'SMOOTH'
+                row3.prop(scene, "smooth_iterations", text="")
+                row3.prop(scene, "smooth_factor", text="")
 
                 # 如果顶点组数量足够显示二分权重选项
                 if len(scene.vertex_group_names) >= 3:
@@ -102,6 +1143,13 @@ class L4D2_PT_WeightsPanel(Panel):
                     # 自定义分割线按钮
                     icon_custom = 'RADIOBUT_ON' if split_mode == 'CUSTOM' else 'RADIOBUT_OFF'
                     custom_op = split_mode_row.operator("l4d2.draw_split_line", text=_("Custom"), icon=icon_custom, depress=(split_mode == 'CUSTOM'))
+
+                    # 表面距离按钮
+                    icon_geodesic = 'RADIOBUT_ON' if split_mode == 'GEODESIC' else 'RADIOBUT_OFF'
+                    geodesic_op = split_mode_row.operator("l4d2.set_split_mode", text=_("Surface"), icon=icon_geodesic, depress=(split_mode == 'GEODESIC'))
+                    geodesic_op.mode = 'GEODESIC'
+                    if split_mode == 'GEODESIC':
+                        layout.prop(scene, "geodesic_seed", expand=True)
                     
                     # 如果当前是自定义分割线模式且未设置，显示警告
                     if split_mode == 'CUSTOM' and not scene.use_custom_split_line:
@@ -111,14 +1159,52 @@ class L4D2_PT_WeightsPanel(Panel):
                     # 第二行：混合因子滑块
                     blend_row = layout.row()
                     blend_row.prop(scene, "blend_factor")
+                    blend_row.prop(scene, "live_blend", text="", icon="PLAY")
                     
                     # 第三行：二分权重执行按钮
                     weight_btn_row = layout.row()
                     weight_btn_row.scale_y = 1.2
                     weight_btn_row.operator("l4d2.process_vertex_groups", text=_("Execute Bisect Weight")).operation = 'WEIGHT_TRANSFER'
+                    weight_btn_row.operator("l4d2.process_vertex_groups", text=_("Execute Band Split")).operation = 'BAND_SPLIT'
+                # 骨骼链投影权重
+                layout.operator_menu_enum("l4d2.chain_projection_weights", "chain_source", text=_("Chain Projection Weights"), icon="BONE_DATA")
             else:
                 layout.label(text=_("Please add vertex groups first"))
 
+            # 起源引擎导出检查：限制每个顶点的骨骼影响数量
+            layout.separator()
+            limit_row = layout.row(align=True)
+            limit_row.operator("l4d2.process_vertex_groups", text=_("Limit and Normalize")).operation = 'LIMIT_AND_NORMALIZE'
+            limit_row.prop(scene, "max_influences", text="")
+            mirror_row = layout.row(align=True)
+            mirror_row.operator("l4d2.process_vertex_groups", text=_("Mirror Weights")).operation = 'MIRROR'
+            mirror_row.prop(scene, "mirror_mode", text="")
+            mirror_row.prop(scene, "mirror_tolerance", text="")
+            layout.operator("l4d2.collapse_mapped_weights", icon="AUTOMERGE_ON")
+            layout.operator("l4d2.transfer_surface_weights", icon="MOD_DATA_TRANSFER")
+            layout.operator("l4d2.prune_weights", icon="BRUSH_DATA")
+
+            # 权重快照恢复
+            snapshot_row = layout.row(align=True)
+            snapshot_row.operator("l4d2.restore_last_snapshot", icon="LOOP_BACK")
+            snapshot_row.operator_menu_enum("l4d2.restore_snapshot", "snapshot", text=_("Restore Snapshot"), icon="RECOVER_LAST")
+            snapshot_row.prop(scene, "snapshot_count", text="")
+            data_row = layout.row(align=True)
+            data_row.operator("l4d2.export_weight_data", icon="EXPORT")
+            data_row.operator("l4d2.import_weight_data", icon="IMPORT")
+
+            # 骨骼预算分析
+            layout.separator()
+            analysis_row = layout.row(align=True)
+            analysis_row.operator("l4d2.analyze_weight_budget", icon="VIEWZOOM")
+            analysis_row.operator("l4d2.export_weight_analysis", text="", icon="EXPORT")
+            if _last_analysis:
+                summary_row = layout.row()
+                summary_row.alert = _last_analysis["bone_count"] > STUDIOMDL_MAX_BONES
+                summary_row.label(text=f"{_last_analysis['armature']}: {_last_analysis['bone_count']}/{STUDIOMDL_MAX_BONES} {_('bones')}, "
+                                       f"{len(_last_analysis['bones_without_group'])} {_('bones without group')}")
+                layout.template_list("L4D2_UL_WeightAnalysis", "", scene, "weight_analysis_items", scene, "weight_analysis_index", rows=4)
+
 class L4D2_OT_AddFromSelectedBones(Operator):
     bl_idname = "scene.add_from_selected_bones"
     bl_label = _("Add from Selected Bones")
@@ -192,22 +1278,7 @@ class L4D2_OT_AddFromSelectedBones(Operator):
     
     def get_related_mesh_objects(self, armature):
         """获取与骨架关联的所有网格物体"""
-        related_objects = []
-        
-        # 检查子对象
-        for child in armature.children:
-            if child.type == 'MESH':
-                related_objects.append(child)
-        
-        # 检查具有Armature修改器的物体
-        for obj in bpy.context.view_layer.objects:
-            if obj.type == 'MESH':
-                for modifier in obj.modifiers:
-                    if modifier.type == 'ARMATURE' and modifier.object == armature:
-                        if obj not in related_objects:
-                            related_objects.append(obj)
-        
-        return related_objects
+        return get_related_mesh_objects(armature)
 
 class L4D2_OT_SelectMeshObject(Operator):
     bl_idname = "wm.select_mesh_object"
@@ -357,58 +1428,179 @@ class L4D2_OT_ProcessVertexGroups(Operator):
     bl_label = _("Process Vertex Groups")
     bl_description = _("Merge: Merge weights of subsequent groups into the first group.\n"
                        "Even: Evenly distribute weights of the first group to subsequent groups.\n"
-                       "Bisect: Distribute the first group's weight to the 2nd and 3rd groups based on the selected axis or custom line.")
+                       "Bisect: Distribute the first group's weight to the 2nd and 3rd groups based on the selected axis or custom line.\n"
+                       "Band: Distribute the first group's weight across all subsequent groups, ordered from the positive to the negative side.\n"
+                       "Smooth: Smooth the weights of all listed groups over the mesh topology, keeping their per-vertex total.\n"
+                       "Limit: Keep the strongest bone influences per vertex and normalize them to 1.0.\n"
+                       "Mirror: Copy or symmetrize the weights of every left/right group pair.")
     
     operation: bpy.props.StringProperty()
-    
+
+    # 批量模式下逐物体的提示由汇总报告代替
+    _batch_mode = False
+    # 当前网格参与运算的顶点索引，None 表示全部顶点
+    _vert_mask = None
+    # 各操作所需的最少顶点组数量
+    required_groups = {'MERGE': 2, 'EVEN_WEIGHT_TRANSFER': 2, 'WEIGHT_TRANSFER': 3, 'BAND_SPLIT': 3, 'SMOOTH': 2,
+                       'LIMIT_AND_NORMALIZE': 0, 'MIRROR': 0}
+    # 快照列表中显示的操作名称
+    operation_labels = {'MERGE': "Merge Vertex Groups", 'EVEN_WEIGHT_TRANSFER': "Even Weight Transfer",
+                        'WEIGHT_TRANSFER': "Execute Bisect Weight", 'BAND_SPLIT': "Execute Band Split",
+                        'SMOOTH': "Smooth Weights", 'LIMIT_AND_NORMALIZE': "Limit and Normalize",
+                        'MIRROR': "Mirror Weights"}
+
     def execute(self, context):
         scene = context.scene
         if not scene.target_mesh_object:
             self.report({'WARNING'}, _("Target object not set"))
             return {'CANCELLED'}
-            
+
         obj = bpy.data.objects.get(scene.target_mesh_object)
         if not obj or obj.type != 'MESH':
             self.report({'WARNING'}, _("Target object is invalid or not a mesh object"))
             return {'CANCELLED'}
-        
+
+        # 顶点组权重只能在物体模式下写入，编辑模式下临时切换，结束后恢复
+        was_editing = obj.mode == 'EDIT'
+        if was_editing:
+            bpy.ops.object.mode_set(mode='OBJECT')
+        try:
+            return self.execute_on(context, obj)
+        finally:
+            if was_editing:
+                bpy.ops.object.mode_set(mode='EDIT')
+
+    def execute_on(self, context, obj):
+        """对目标物体（或批量模式下骨架绑定的所有网格）执行当前操作"""
+        scene = context.scene
+        if scene.process_all_meshes:
+            return self.execute_batch(context, obj)
+        self._batch_mode = False
+
+        # 影响数量限制和镜像作用于全部骨骼顶点组，不依赖列表
+        if self.required_groups.get(self.operation) == 0:
+            self.run_operation(context, obj, [])
+            return {'FINISHED'}
+
         # 从列表项获取顶点组名称，优先使用 actual_group 字段，如果为空则使用 name 字段
         group_names = []
         for group in scene.vertex_group_names:
             group_name = group.actual_group if group.actual_group else group.name
             if group_name and group_name in obj.vertex_groups:
                 group_names.append(group_name)
-        
+
         if len(group_names) < 2:
             self.report({'WARNING'}, _("Please select at least two vertex groups"))
             return {'CANCELLED'}
-        
+
+        if self.operation in {'WEIGHT_TRANSFER', 'BAND_SPLIT'} and len(group_names) < 3:
+            self.report({'WARNING'}, _("Bisect weight requires at least three vertex groups selected"))
+            return {'CANCELLED'}
+        self.run_operation(context, obj, group_names)
+
+        return {'FINISHED'}
+
+    def execute_batch(self, context, obj):
+        """对目标物体骨架绑定的所有网格执行当前操作，跳过缺少所需顶点组的网格"""
+        armature = get_armature_object(obj)
+        if armature is None:
+            self.report({'WARNING'}, _("Batch mode requires the target object to be bound to an armature"))
+            return {'CANCELLED'}
+
+        wanted = list(dict.fromkeys(
+            group.actual_group or group.name for group in context.scene.vertex_group_names
+            if group.actual_group or group.name))
+        required = self.required_groups.get(self.operation, 0)
+        if len(wanted) < required:
+            if required >= 3:
+                self.report({'WARNING'}, _("Bisect weight requires at least three vertex groups selected"))
+            else:
+                self.report({'WARNING'}, _("Please select at least two vertex groups"))
+            return {'CANCELLED'}
+
+        mesh_objects = get_related_mesh_objects(armature) or [obj]
+        # 预先为所有网格建立一次顶点组名称索引
+        name_index = build_group_name_index(mesh_objects)
+
+        self._batch_mode = True
+        processed = 0
+        changed_total = 0
+        for mesh_obj in mesh_objects:
+            group_names = self.resolve_batch_groups(wanted, required, name_index[mesh_obj.name])
+            if group_names is None:
+                continue
+            start_time = time.perf_counter()
+            changed = self.run_operation(context, mesh_obj, group_names) or 0
+            elapsed = (time.perf_counter() - start_time) * 1000.0
+            processed += 1
+            changed_total += changed
+            self.report({'INFO'}, f"{mesh_obj.name}: {changed} {_('vertices changed')}, {elapsed:.1f} ms")
+
+        self.report({'INFO'}, f"{_('Batch processed')} {processed}/{len(mesh_objects)} {_('objects')}, "
+                              f"{changed_total} {_('vertices changed')}")
+        return {'FINISHED'}
+
+    def resolve_batch_groups(self, wanted, required, group_index):
+        """返回该网格上参与运算的顶点组名称，缺少所需顶点组时返回 None"""
+        if required == 0:
+            return []
+        if self.operation in {'WEIGHT_TRANSFER', 'BAND_SPLIT'}:
+            # 分割操作按位置区分中间组和目标组，必须全部存在
+            positional = wanted[:3] if self.operation == 'WEIGHT_TRANSFER' else wanted
+            return positional if all(name in group_index for name in positional) else None
+        if wanted[0] not in group_index:
+            return None
+        group_names = [name for name in wanted if name in group_index]
+        return group_names if len(group_names) >= required else None
+
+    def run_operation(self, context, obj, group_names):
+        """执行当前操作，返回发生变化的顶点数"""
+        # 镜像需要两侧的顶点，不受遮罩限制
+        self._vert_mask = None if self.operation == 'MIRROR' else get_masked_vertices(obj, context.scene)
+        if self._vert_mask is not None and len(self._vert_mask) == 0:
+            self.info(_("No vertices in the weight mask"))
+            return 0
+        # 操作前保存受影响顶点组的快照，影响全部骨骼组的操作保存全部顶点组
+        take_weight_snapshot(obj, f"{_(self.operation_labels.get(self.operation, self.operation))} "
+                                  f"{time.strftime('%H:%M:%S')}",
+                             group_names, context.scene.snapshot_count, self._vert_mask)
+        if self.operation not in {'WEIGHT_TRANSFER', 'BAND_SPLIT'}:
+            invalidate_split_cache(obj)
         if self.operation == 'MERGE':
-            self.merge_vertex_groups(obj, group_names)
+            return self.merge_vertex_groups(obj, group_names)
         elif self.operation == 'EVEN_WEIGHT_TRANSFER':
-            self.even_weight_transfer(context, obj, group_names)
+            return self.even_weight_transfer(context, obj, group_names)
         elif self.operation == 'WEIGHT_TRANSFER':
-            if len(group_names) < 3:
-                self.report({'WARNING'}, _("Bisect weight requires at least three vertex groups selected"))
-                return {'CANCELLED'}
-            self.weight_transfer(context, obj, group_names)
-        
-        return {'FINISHED'}
-    
+            return self.weight_transfer(context, obj, group_names)
+        elif self.operation == 'BAND_SPLIT':
+            return self.band_split(context, obj, group_names)
+        elif self.operation == 'SMOOTH':
+            return self.smooth_weights(context, obj, group_names)
+        elif self.operation == 'LIMIT_AND_NORMALIZE':
+            return self.limit_and_normalize(context, obj)
+        elif self.operation == 'MIRROR':
+            return self.mirror_weights(context, obj)
+        return 0
+
+    def info(self, message):
+        """报告单个物体的处理结果，批量模式下不逐条提示"""
+        if not self._batch_mode:
+            self.report({'INFO'}, message)
+
     def merge_vertex_groups(self, obj, group_names):
-        target_group = obj.vertex_groups[group_names[0]]
-        for group_name in group_names[1:]:
-            group = obj.vertex_groups.get(group_name)
-            if group:
-                for vertex in obj.data.vertices:
-                    try:
-                        weight = group.weight(vertex.index)
-                    except RuntimeError:
-                        weight = 0.0
-                    if weight > 0.0:
-                        target_group.add([vertex.index], weight, 'ADD')
-                obj.vertex_groups.remove(group)
-        self.report({'INFO'}, _("Vertex group merge completed"))
+        target_name = group_names[0]
+        source_names = [name for name in dict.fromkeys(group_names[1:]) if name != target_name]
+
+        # 一次遍历读取目标组和所有源组的权重，按顶点累加后批量写回目标组
+        changed = collapse_group_weights(obj, {name: target_name for name in source_names}, self._vert_mask)
+        # 使用遮罩时源组在遮罩外仍有权重，保留源组
+        if self._vert_mask is None:
+            for name in source_names:
+                group = obj.vertex_groups.get(name)
+                if group:
+                    obj.vertex_groups.remove(group)
+        self.info(_("Vertex group merge completed"))
+        return changed
 
     def even_weight_transfer(self, context, obj, group_names):
         middle_group_name = group_names[0]
@@ -417,221 +1609,936 @@ class L4D2_OT_ProcessVertexGroups(Operator):
         if middle_group_name in obj.vertex_groups and \
            all(group_name in obj.vertex_groups for group_name in target_groups):
 
-            middle_group_index = obj.vertex_groups[middle_group_name].index
-            target_group_indices = [obj.vertex_groups[group_name].index for group_name in target_groups]
-            split_weight = 1.0 / len(target_groups)
+            middle_group = obj.vertex_groups[middle_group_name]
 
-            for vert in obj.data.vertices:
-                for group in vert.groups:
-                    if group.group == middle_group_index:
-                        weight = group.weight * split_weight
-                        obj.vertex_groups[middle_group_index].remove([vert.index])
-                        for target_group_index in target_group_indices:
-                            obj.vertex_groups[target_group_index].add([vert.index], weight, 'ADD')
+            # 一次遍历收集中间组的 (顶点索引, 权重)
+            vert_indices, group_ids, weights = read_group_weights(obj, [middle_group.index], self._vert_mask)
+            if len(vert_indices) == 0:
+                self.info(_("No vertices found affected by the middle vertex group"))
+                return 0
 
-            self.report({'INFO'}, _("Weight distribution completed"))
+            if context.scene.even_transfer_mode == 'DISTANCE':
+                # 按顶点到各目标骨骼的距离分配权重
+                shares = self._bone_distance_shares(obj, vert_indices, target_groups, self.evaluated_coords(context, obj))
+                if shares is None:
+                    self.report({'WARNING'}, _("Distance mode requires an armature with bones matching the target groups"))
+                    return 0
+            else:
+                shares = np.full((len(vert_indices), len(target_groups)), 1.0 / len(target_groups), dtype=np.float32)
+
+            # 一次性移除中间组，再为每个目标组批量添加
+            middle_group.remove(vert_indices.tolist())
+            for column, group_name in enumerate(target_groups):
+                write_group_weights(obj.vertex_groups[group_name], vert_indices, weights * shares[:, column], 'ADD')
+
+            self.info(_("Weight distribution completed"))
+            return len(vert_indices)
         else:
             self.report({'WARNING'}, _("One or more specified vertex groups do not exist"))
+            return 0
+
+    def _bone_distance_shares(self, obj, vert_indices, bone_names, coords=None):
+        """按反距离平方计算每个顶点分给各骨骼的比例，每行之和为 1
+
+        coords 为求值后的顶点坐标时使用当前姿态的骨骼，否则使用静止坐标和静止姿态。
+        """
+        armature = get_armature_object(obj)
+        if armature is None:
+            return None
+        segments = get_bone_segments(obj, armature, bone_names, coords is not None)
+        if segments is None:
+            return None
+        coords = (read_vertex_coords(obj.data) if coords is None else coords)[vert_indices]
+        t, distances = project_points_to_segments(coords, *segments)
+        inverse = 1.0 / np.maximum(distances, 1e-6) ** 2
+        return (inverse / inverse.sum(axis=1, keepdims=True)).astype(np.float32)
+
+    def smooth_weights(self, context, obj, group_names):
+        """在列表中的顶点组之间做拓扑平滑，并保持每个顶点在这些组上的权重总和不变"""
+        scene = context.scene
+        vertex_count = len(obj.data.vertices)
+        group_ids_wanted = [obj.vertex_groups[name].index for name in group_names]
+        column_of = np.zeros(len(obj.vertex_groups), dtype=np.int32)
+        column_of[group_ids_wanted] = np.arange(len(group_ids_wanted), dtype=np.int32)
+
+        vert_indices, group_ids, weights = read_group_weights(obj, group_ids_wanted)
+        if len(vert_indices) == 0:
+            self.info(_("No vertices found affected by the middle vertex group"))
+            return 0
+        columns = column_of[group_ids]
+        matrix = np.zeros((vertex_count, len(group_ids_wanted)), dtype=np.float32)
+        matrix[vert_indices, columns] = weights
+        present = np.zeros_like(matrix, dtype=bool)
+        present[vert_indices, columns] = True
+
+        smoothed = smooth_weight_matrix(matrix, get_vertex_adjacency(obj.data), scene.smooth_iterations, scene.smooth_factor)
+
+        # 只在原有区域内重新归一化到原权重总和，避免权重扩散到区域外
+        totals = matrix.sum(axis=1)
+        region = totals > 0.0
+        smoothed_totals = smoothed.sum(axis=1)
+        scale = np.zeros(vertex_count, dtype=np.float32)
+        valid = region & (smoothed_totals > 0.0)
+        scale[valid] = totals[valid] / smoothed_totals[valid]
+        smoothed *= scale[:, None]
+
+        changed = region & (np.abs(smoothed - matrix).max(axis=1) > WEIGHT_QUANT_STEP * 0.5)
+        if self._vert_mask is not None:
+            # 平滑需要邻域的权重，按全网格计算后只写回遮罩内的顶点
+            in_mask = np.zeros(vertex_count, dtype=bool)
+            in_mask[self._vert_mask] = True
+            changed &= in_mask
+        for column, group_name in enumerate(group_names):
+            group = obj.vertex_groups[group_name]
+            keep = changed & (smoothed[:, column] > WEIGHT_EPSILON)
+            dropped = changed & ~keep & present[:, column]
+            if dropped.any():
+                group.remove(np.flatnonzero(dropped).tolist())
+            kept_indices = np.flatnonzero(keep)
+            write_group_weights(group, kept_indices, smoothed[kept_indices, column])
+
+        changed_count = int(np.count_nonzero(changed))
+        self.info(f"{_('Smoothed')} {changed_count} {_('vertices')} ({scene.smooth_iterations} {_('iterations')})")
+        return changed_count
+
+    def mirror_weights(self, context, obj):
+        """一次处理所有左右成对的顶点组：从一侧复制到另一侧，或对称化两侧"""
+        mode = context.scene.mirror_mode
+        pairs = get_mirror_group_pairs(obj)
+        if not pairs:
+            self.info(_("No left/right vertex group pairs found"))
+            return 0
 
-    # 辅助函数：Smoothstep
-    def _smoothstep(self, edge0, edge1, x):
-        if edge0 == edge1: # 处理边缘情况
-            return 0.0 if x < edge0 else 1.0
-        # Clamp x to be within the range [edge0, edge1]
-        t = max(0.0, min(1.0, (x - edge0) / (edge1 - edge0)))
-        # Evaluate polynomial
-        return t * t * (3.0 - 2.0 * t)
+        vertex_count = len(obj.data.vertices)
+        mirror_index = get_mirror_index(obj.data, context.scene.mirror_tolerance)
+        matched = mirror_index >= 0
+        safe_index = np.where(matched, mirror_index, 0)
+
+        pair_names = [name for pair in pairs for name in pair]
+        vert_indices, group_ids, weights = read_group_weights(obj, [obj.vertex_groups[name].index for name in pair_names])
+        entries_of = dict(split_by_group(group_ids))
+
+        changed = np.zeros(vertex_count, dtype=bool)
+        for left_name, right_name in pairs:
+            columns = {}
+            for name in (left_name, right_name):
+                column = np.zeros(vertex_count, dtype=np.float32)
+                entries = entries_of.get(obj.vertex_groups[name].index)
+                if entries is not None:
+                    column[vert_indices[entries]] = weights[entries]
+                columns[name] = column
+            left = columns[left_name]
+            right = columns[right_name]
+
+            if mode == 'LEFT_TO_RIGHT':
+                updates = {right_name: np.where(matched, left[safe_index], right)}
+            elif mode == 'RIGHT_TO_LEFT':
+                updates = {left_name: np.where(matched, right[safe_index], left)}
+            else:
+                symmetric_left = np.where(matched, (left + right[safe_index]) * 0.5, left)
+                updates = {left_name: symmetric_left,
+                           right_name: np.where(matched, symmetric_left[safe_index], right)}
+
+            for name, new_column in updates.items():
+                old_column = columns[name]
+                group = obj.vertex_groups[name]
+                diff = np.abs(new_column - old_column) > WEIGHT_QUANT_STEP * 0.5
+                dropped = np.flatnonzero(diff & (new_column <= WEIGHT_EPSILON) & (old_column > 0.0))
+                if len(dropped):
+                    group.remove(dropped.tolist())
+                written = np.flatnonzero(diff & (new_column > WEIGHT_EPSILON))
+                write_group_weights(group, written, new_column[written])
+                changed |= diff
+
+        changed_count = int(np.count_nonzero(changed))
+        unmatched = vertex_count - int(np.count_nonzero(matched))
+        self.info(f"{_('Mirrored')} {len(pairs)} {_('group pairs')}, {changed_count} {_('vertices changed')}, "
+                  f"{unmatched} {_('vertices without a mirror')}")
+        return changed_count
+
+    def limit_and_normalize(self, context, obj):
+        """对单个网格执行影响数量限制和归一化，返回超出限制的顶点数"""
+        max_influences = context.scene.max_influences
+        limited, removed = limit_and_normalize_weights(obj, max_influences, get_deform_group_indices(obj), self._vert_mask)
+        self.info(f"{limited} {_('vertices exceeded')} {max_influences} {_('influences')}, "
+                  f"{removed} {_('weight entries removed')}")
+        return limited
 
     def weight_transfer(self, context, obj, group_names):
+        """二分权重：把首个组的权重分给第2、3组（N 带分割在 N=2 时的特例）"""
+        return self.split_transfer(context, obj, group_names[0], group_names[1:3])
+
+    def band_split(self, context, obj, group_names):
+        """N 带分割：把首个组的权重沿分割方向分给其余所有组"""
+        return self.split_transfer(context, obj, group_names[0], group_names[1:])
+
+    def split_transfer(self, context, obj, middle_group_name, target_names):
         """根据当前分割模式调用对应的权重转移函数"""
         split_mode = context.scene.split_mode
         
         if split_mode == 'X_AXIS':
-            self.weight_transfer_axis(context, obj, group_names, 'X')
+            return self.weight_transfer_axis(context, obj, middle_group_name, target_names, 'X')
         elif split_mode == 'Y_AXIS':
-            self.weight_transfer_axis(context, obj, group_names, 'Y')
+            return self.weight_transfer_axis(context, obj, middle_group_name, target_names, 'Y')
         elif split_mode == 'Z_AXIS':
-            self.weight_transfer_axis(context, obj, group_names, 'Z')
+            return self.weight_transfer_axis(context, obj, middle_group_name, target_names, 'Z')
         elif split_mode == 'CUSTOM' and context.scene.use_custom_split_line:
-            self.weight_transfer_custom(context, obj, group_names)
+            return self.weight_transfer_custom(context, obj, middle_group_name, target_names)
+        elif split_mode == 'GEODESIC':
+            return self.weight_transfer_geodesic(context, obj, middle_group_name, target_names)
         else:
             # 默认使用X轴
-            self.weight_transfer_axis(context, obj, group_names, 'X')
-    
-    def weight_transfer_axis(self, context, obj, group_names, axis):
-        """按指定轴向进行二分权重转移"""
-        middle_group_name = group_names[0]
-        left_group_name = group_names[1]  # 接收正侧的权重
-        right_group_name = group_names[2] # 接收负侧的权重
+            return self.weight_transfer_axis(context, obj, middle_group_name, target_names, 'X')
 
-        if middle_group_name in obj.vertex_groups and \
-           left_group_name in obj.vertex_groups and \
-           right_group_name in obj.vertex_groups:
-
-            middle_group_index = obj.vertex_groups[middle_group_name].index
-            left_group_index = obj.vertex_groups[left_group_name].index
-            right_group_index = obj.vertex_groups[right_group_name].index
-
-            # 获取混合因子
-            blend_factor = context.scene.blend_factor
-
-            # 收集受影响顶点及其信息
-            vertices_to_process = [] # (vert_index, original_weight, position)
-            positions = []
-            
-            # 根据轴向获取位置坐标
-            for vert in obj.data.vertices:
-                for group in vert.groups:
-                    if group.group == middle_group_index and group.weight > 0.0001:
-                        # 根据选择的轴向获取坐标
-                        if axis == 'X':
-                            pos = vert.co.x
-                        elif axis == 'Y':
-                            pos = vert.co.y
-                        else:  # Z轴
-                            pos = vert.co.z
-                            
-                        vertices_to_process.append((vert.index, group.weight, pos))
-                        positions.append(pos)
-                        break
-            
-            if not vertices_to_process:
-                self.report({'INFO'}, _("No vertices found affected by the middle vertex group"))
-                return
-            
-            # 计算中心线和混合区域
-            min_pos = min(positions)
-            max_pos = max(positions)
-            center_line = sum(positions) / len(positions)
-            
-            # 如果所有点位置相同或混合因子为0，则等同于硬分割
-            if max_pos == min_pos or blend_factor == 0.0:
-                blend_start = center_line
-                blend_end = center_line
-            else:
-                half_width = (max_pos - min_pos) * blend_factor * 0.5
-                blend_start = center_line - half_width
-                blend_end = center_line + half_width
-                # 钳制混合区域在实际坐标范围内
-                blend_start = max(min_pos, blend_start)
-                blend_end = min(max_pos, blend_end)
-                # 再次检查防止浮点误差导致 start > end
-                if blend_start > blend_end:
-                    blend_start = blend_end = center_line
-
-            # 优化：一次性移除所有相关顶点在中间组的权重
-            vert_indices_to_remove = [v[0] for v in vertices_to_process]
-            obj.vertex_groups[middle_group_index].remove(vert_indices_to_remove)
-
-            # 遍历并分配权重
-            for vert_index, original_weight, position in vertices_to_process:
-                # 计算平滑因子 (0 -> 1)
-                s_factor = self._smoothstep(blend_start, blend_end, position)
-
-                # 计算分配给左右组的权重
-                weight_left = original_weight * s_factor
-                weight_right = original_weight * (1.0 - s_factor)
-
-                # 添加权重 (使用 ADD 是因为中间组权重已被移除)
-                if weight_left > 0.0001: # 忽略极小的权重以保持稀疏性
-                    obj.vertex_groups[left_group_index].add([vert_index], weight_left, 'ADD')
-                if weight_right > 0.0001:
-                    obj.vertex_groups[right_group_index].add([vert_index], weight_right, 'ADD')
-
-            self.report({'INFO'}, f"{_('Bisect weight completed using')} {axis} {_('axis')} ({_('Blend Factor:')} {blend_factor:.2f})")
+    def split_weights(self, obj, middle_group_name, target_names, blend_factor, plane_normal, plane_d=None, coords=None):
+        """分割核心：按顶点到分割平面的有符号距离把中间组权重分给各目标组
+
+        target_names 按从正侧到负侧的顺序排列，两个目标组时即为二分权重。
+        plane_d 为 None 时平面穿过受影响顶点的平均位置，且混合区间钳制在坐标范围内。
+        coords 为求值后的顶点坐标，None 时使用静止坐标。
+        同一平面、顶点组和顶点坐标再次执行时，先从缓存恢复上一次的结果，再用新的混合因子重新分配。
+        返回处理的顶点数，组不存在时返回 None。
+        """
+        if coords is None:
+            coords = read_vertex_coords(obj.data)
+        return self.split_with_field(obj, middle_group_name, target_names, blend_factor,
+                                     plane_field_key(plane_normal, plane_d) + (coords_field_key(coords),),
+                                     lambda vert_indices: plane_distances(coords, vert_indices, plane_normal, plane_d),
+                                     plane_d is None)
+
+    def evaluated_coords(self, context, obj):
+        """开启求值坐标时返回姿态、形态键和修改器作用后的顶点坐标，否则返回 None 表示使用静止坐标"""
+        if not context.scene.use_evaluated_positions:
+            return None
+        coords = read_evaluated_coords(obj, context.evaluated_depsgraph_get())
+        if coords is None:
+            self.report({'WARNING'}, f"{obj.name}: {_('Modifiers change the vertex count, using rest positions')}")
+        return coords
+
+    def split_with_field(self, obj, middle_group_name, target_names, blend_factor, field_key, distances_of, clamp_to_range):
+        """按任意有符号距离场分割，field_key 用于识别缓存中的同一距离场"""
+        if middle_group_name not in obj.vertex_groups or \
+           not all(name in obj.vertex_groups for name in target_names):
+            return None
+
+        key = split_cache_key(middle_group_name, target_names, field_key, self._vert_mask)
+        entry = get_applied_split(obj, key)
+        if entry is not None:
+            restore_split_entry(obj, entry)
         else:
+            entry = build_split_entry(obj, key, middle_group_name, target_names, distances_of, clamp_to_range, self._vert_mask)
+            if entry is None:
+                invalidate_split_cache(obj)
+                return 0
+            _split_cache[obj.data.as_pointer()] = entry
+
+        apply_split_entry(obj, entry, blend_factor)
+        return len(entry.vert_indices)
+
+    def weight_transfer_axis(self, context, obj, middle_group_name, target_names, axis):
+        """按指定轴向进行权重分割"""
+        blend_factor = context.scene.blend_factor
+        axis_normal = {'X': (1.0, 0.0, 0.0), 'Y': (0.0, 1.0, 0.0), 'Z': (0.0, 0.0, 1.0)}[axis]
+
+        processed = self.split_weights(obj, middle_group_name, target_names, blend_factor, axis_normal,
+                                       coords=self.evaluated_coords(context, obj))
+        if processed is None:
             self.report({'WARNING'}, _("One or more specified vertex groups do not exist"))
-    
-    def weight_transfer_custom(self, context, obj, group_names):
-        """使用自定义分割线进行二分权重转移"""
-        middle_group_name = group_names[0]
-        left_group_name = group_names[1]  # 接收正侧的权重
-        right_group_name = group_names[2] # 接收负侧的权重
+            return 0
+        elif processed == 0:
+            self.info(_("No vertices found affected by the middle vertex group"))
+        elif len(target_names) > 2:
+            self.info(f"{_('Band split completed with')} {len(target_names)} {_('bands along')} {axis} ({_('Blend Factor:')} {blend_factor:.2f})")
+        else:
+            self.info(f"{_('Bisect weight completed using')} {axis} {_('axis')} ({_('Blend Factor:')} {blend_factor:.2f})")
+        return processed
 
-        if middle_group_name in obj.vertex_groups and \
-           left_group_name in obj.vertex_groups and \
-           right_group_name in obj.vertex_groups:
-
-            middle_group_index = obj.vertex_groups[middle_group_name].index
-            left_group_index = obj.vertex_groups[left_group_name].index
-            right_group_index = obj.vertex_groups[right_group_name].index
-
-            # 获取混合因子
-            blend_factor = context.scene.blend_factor
-            
-            # 获取分割线的起点和终点
-            start_point = Vector(context.scene.split_line_start)
-            end_point = Vector(context.scene.split_line_end)
-            
-            # 计算分割线的方向向量
-            line_direction = (end_point - start_point).normalized()
-            
-            # 构建分割平面的法向量 (线的垂直方向)
-            # 注意：在3D空间中，一条线的垂直方向有无数种，这里我们取一个合理的
-            if abs(line_direction.z) < 0.9:  # 如果线不是接近垂直的
-                plane_normal = Vector((line_direction.y, -line_direction.x, 0)).normalized()
-            else:  # 如果线接近垂直，使用X轴作为参考
-                plane_normal = Vector((1, 0, 0)) - line_direction * line_direction.x
-                plane_normal.normalize()
-            
-            # 使用平面方程 ax + by + cz + d = 0 来计算顶点相对于平面的位置
-            # 其中 (a,b,c) 是平面法向量，d 是平面常数
-            plane_d = -start_point.dot(plane_normal)
-            
-            # 收集顶点并计算它们相对于分割平面的有符号距离
-            vertices_to_process = [] # (vert_index, original_weight, distance)
-            distances = []
-            
-            for vert in obj.data.vertices:
-                for group in vert.groups:
-                    if group.group == middle_group_index and group.weight > 0.0001:
-                        # 计算顶点到平面的有符号距离
-                        distance = vert.co.dot(plane_normal) + plane_d
-                        vertices_to_process.append((vert.index, group.weight, distance))
-                        distances.append(distance)
-                        break
-            
-            # 如果没有影响顶点
-            if not vertices_to_process:
-                self.report({'INFO'}, _("No vertices found affected by the middle vertex group"))
-                return
-            
-            # 计算距离的最大和最小值用于混合
-            min_distance = min(distances)
-            max_distance = max(distances)
-            
-            # 如果所有点在平面上或混合因子为0，则进行硬分割
-            if min_distance == max_distance or blend_factor == 0.0:
-                blend_start = 0
-                blend_end = 0
-            else:
-                # 计算混合区域
-                half_width = (max_distance - min_distance) * blend_factor * 0.5
-                blend_start = -half_width
-                blend_end = half_width
-
-            # 一次性移除所有相关顶点在中间组的权重
-            vert_indices_to_remove = [v[0] for v in vertices_to_process]
-            obj.vertex_groups[middle_group_index].remove(vert_indices_to_remove)
-
-            # 遍历并分配权重
-            for vert_index, original_weight, distance in vertices_to_process:
-                # 根据顶点到平面的距离计算混合因子
-                s_factor = self._smoothstep(blend_start, blend_end, distance)
-
-                # 计算分配给左右组的权重
-                weight_left = original_weight * s_factor
-                weight_right = original_weight * (1.0 - s_factor)
-
-                # 添加权重
-                if weight_left > 0.0001:
-                    obj.vertex_groups[left_group_index].add([vert_index], weight_left, 'ADD')
-                if weight_right > 0.0001:
-                    obj.vertex_groups[right_group_index].add([vert_index], weight_right, 'ADD')
-
-            self.report({'INFO'}, f"{_('Bisect weight completed using custom split line')} ({_('Blend Factor:')} {blend_factor:.2f})")
+    def weight_transfer_custom(self, context, obj, middle_group_name, target_names):
+        """使用自定义分割线进行权重分割"""
+        blend_factor = context.scene.blend_factor
+        plane_normal, plane_d = self.custom_split_plane(context)
+
+        processed = self.split_weights(obj, middle_group_name, target_names, blend_factor, plane_normal, plane_d,
+                                       coords=self.evaluated_coords(context, obj))
+        if processed is None:
+            self.report({'WARNING'}, _("One or more specified vertex groups do not exist"))
+            return 0
+        elif processed == 0:
+            self.info(_("No vertices found affected by the middle vertex group"))
+        elif len(target_names) > 2:
+            self.info(f"{_('Band split completed with')} {len(target_names)} {_('bands along custom split line')} ({_('Blend Factor:')} {blend_factor:.2f})")
         else:
+            self.info(f"{_('Bisect weight completed using custom split line')} ({_('Blend Factor:')} {blend_factor:.2f})")
+        return processed
+
+    def weight_transfer_geodesic(self, context, obj, middle_group_name, target_names):
+        """按表面距离进行权重分割，避免权重跨过缝隙传到另一侧（如双腿、手指之间）"""
+        blend_factor = context.scene.blend_factor
+        evaluated_coords = self.evaluated_coords(context, obj)
+        evaluated = evaluated_coords is not None
+        coords = (evaluated_coords if evaluated else read_vertex_coords(obj.data)).astype(np.float64)
+        seeds = self.geodesic_seeds(context, obj, middle_group_name, target_names, coords, evaluated)
+        if seeds is None:
+            return 0
+
+        def distances_of(vert_indices):
+            allowed = np.zeros(len(obj.data.vertices), dtype=bool)
+            allowed[vert_indices] = True
+            allowed[seeds] = True
+            adjacency = get_vertex_adjacency(obj.data)
+            first = geodesic_distances(coords, adjacency, allowed, [seeds[0]])[vert_indices]
+            if len(target_names) > 2:
+                # 分带时沿到第一个种子的表面距离排列，距离越近越靠前
+                far = float(first[np.isfinite(first)].max()) + 1.0 if np.isfinite(first).any() else 1.0
+                return -np.where(np.isfinite(first), first, far)
+            second = geodesic_distances(coords, adjacency, allowed, [seeds[1]])[vert_indices]
+            return geodesic_bisect_field(first, second)
+
+        processed = self.split_with_field(obj, middle_group_name, target_names, blend_factor,
+                                          ('GEODESIC', tuple(seeds), coords_field_key(coords)), distances_of, False)
+        if processed is None:
             self.report({'WARNING'}, _("One or more specified vertex groups do not exist"))
+            return 0
+        elif processed == 0:
+            self.info(_("No vertices found affected by the middle vertex group"))
+        elif len(target_names) > 2:
+            self.info(f"{_('Band split completed with')} {len(target_names)} {_('bands along surface distance')} ({_('Blend Factor:')} {blend_factor:.2f})")
+        else:
+            self.info(f"{_('Bisect weight completed using surface distance')} ({_('Blend Factor:')} {blend_factor:.2f})")
+        return processed
+
+    def geodesic_seeds(self, context, obj, middle_group_name, target_names, coords, posed):
+        """返回表面距离的种子顶点：编辑模式下依次点选的顶点，或离目标骨骼头部最近的中间组顶点"""
+        seed_count = 1 if len(target_names) > 2 else 2
+        if context.scene.geodesic_seed == 'PICKED':
+            # 退出编辑模式时点选顺序会保存在网格中，从网格读取即可
+            bm = bmesh.new()
+            bm.from_mesh(obj.data)
+            history = [element.index for element in bm.select_history if isinstance(element, bmesh.types.BMVert)]
+            bm.free()
+            if len(history) < seed_count:
+                self.report({'WARNING'}, f"{_('Pick at least')} {seed_count} {_('seed vertices in order')}")
+                return None
+            return history[:seed_count]
+
+        armature = get_armature_object(obj)
+        segments = get_bone_segments(obj, armature, target_names[:seed_count], posed) if armature else None
+        if segments is None:
+            self.report({'WARNING'}, _("Bone seeds require an armature with bones matching the target groups"))
+            return None
+        middle_indices, group_ids, weights = read_group_weights(obj, [obj.vertex_groups[middle_group_name].index], self._vert_mask)
+        if len(middle_indices) == 0:
+            self.info(_("No vertices found affected by the middle vertex group"))
+            return None
+        coords = coords[middle_indices]
+        heads = segments[0]
+        nearest = np.argmin(((coords[:, None, :] - heads[None, :, :]) ** 2).sum(axis=2), axis=0)
+        return middle_indices[nearest].tolist()
+
+    def custom_split_plane(self, context):
+        """由自定义分割线构建分割平面，返回 (法向量, 平面常数 d)"""
+        # 获取分割线的起点和终点
+        start_point = Vector(context.scene.split_line_start)
+        end_point = Vector(context.scene.split_line_end)
+        
+        # 计算分割线的方向向量
+        line_direction = (end_point - start_point).normalized()
+        
+        # 构建分割平面的法向量 (线的垂直方向)
+        # 注意：在3D空间中，一条线的垂直方向有无数种，这里我们取一个合理的
+        if abs(line_direction.z) < 0.9:  # 如果线不是接近垂直的
+            plane_normal = Vector((line_direction.y, -line_direction.x, 0)).normalized()
+        else:  # 如果线接近垂直，使用X轴作为参考
+            plane_normal = Vector((1, 0, 0)) - line_direction * line_direction.x
+            plane_normal.normalize()
+        
+        # 使用平面方程 ax + by + cz + d = 0 来计算顶点相对于平面的位置
+        # 其中 (a,b,c) 是平面法向量，d 是平面常数
+        plane_d = -start_point.dot(plane_normal)
+        return tuple(plane_normal), plane_d
+
+class L4D2_OT_ChainProjectionWeights(Operator):
+    bl_idname = "l4d2.chain_projection_weights"
+    bl_label = _("Chain Projection Weights")
+    bl_description = _("Distribute the first group's weight over a bone chain by projecting each vertex onto the bone segments")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    chain_source: bpy.props.EnumProperty(
+        name=_("Bone Chain"),
+        items=[
+            ('SELECTED', _("Selected Bones"), _("Use the bones currently selected on the armature")),
+            ('SKIRT', _("Skirt Bones"), _("Use the bones matching the skirt keywords")),
+            ('HAIR', _("Hair Bones"), _("Use the bones matching the hair keywords")),
+        ],
+        default='SELECTED'
+    )
+    falloff: FloatProperty(
+        name=_("Falloff"),
+        description=_("Distance falloff exponent, higher values keep weights closer to each bone"),
+        default=2.0,
+        min=0.5,
+        max=8.0
+    )
+
+    def execute(self, context):
+        # 在编辑模式下也要读取到最新的网格数据并能写入顶点组
+        with object_mode(context):
+            return self.project(context)
+
+    def project(self, context):
+        """把首个顶点组的权重投影分配到骨骼链上"""
+        scene = context.scene
+        obj = bpy.data.objects.get(scene.target_mesh_object) if scene.target_mesh_object else None
+        if not obj or obj.type != 'MESH':
+            self.report({'WARNING'}, _("Target object is invalid or not a mesh object"))
+            return {'CANCELLED'}
+
+        source_name = next((group.actual_group or group.name for group in scene.vertex_group_names
+                            if (group.actual_group or group.name) in obj.vertex_groups), None)
+        if source_name is None:
+            self.report({'WARNING'}, _("Please add vertex groups first"))
+            return {'CANCELLED'}
+
+        armature = get_armature_object(obj)
+        if armature is None:
+            self.report({'WARNING'}, _("Could not find the armature bound to the target object"))
+            return {'CANCELLED'}
+        bone_names = [name for name in find_chain_bones(armature, self.chain_source) if name != source_name]
+        if not bone_names:
+            self.report({'WARNING'}, _("No bones found for the selected chain"))
+            return {'CANCELLED'}
+
+        # 读取源组的 (顶点索引, 权重) 和对应坐标
+        source_group = obj.vertex_groups[source_name]
+        vert_indices, group_ids, weights = read_group_weights(obj, [source_group.index])
+        if len(vert_indices) == 0:
+            self.report({'INFO'}, _("No vertices found affected by the middle vertex group"))
+            return {'CANCELLED'}
+        coords = read_vertex_coords(obj.data)[vert_indices]
+        heads, tails = get_bone_segments(obj, armature, bone_names)
+
+        # 影响数量限制需扣除顶点上已有的、不属于骨骼链的骨骼组
+        limits = np.maximum(scene.max_influences - self.other_influence_counts(obj, vert_indices, source_name, bone_names), 1)
+        shares = chain_projection_shares(coords, heads, tails, self.falloff, limits,
+                                         chain_parent_columns(armature, bone_names))
+
+        # 源组权重全部转移给骨骼链，每根骨骼一次批量写入
+        take_weight_snapshot(obj, f"{_('Chain Projection Weights')} {time.strftime('%H:%M:%S')}", [],
+                             scene.snapshot_count)
+        invalidate_split_cache(obj)
+        source_group.remove(vert_indices.tolist())
+        for column, bone_name in enumerate(bone_names):
+            bone_weights = weights * shares[:, column]
+            keep = bone_weights > WEIGHT_EPSILON
+            if not keep.any():
+                continue
+            target_group = obj.vertex_groups.get(bone_name) or obj.vertex_groups.new(name=bone_name)
+            write_group_weights(target_group, vert_indices[keep], bone_weights[keep], 'ADD')
+
+        self.report({'INFO'}, f"{_('Projected')} {len(vert_indices)} {_('vertices')} {_('onto')} {len(bone_names)} {_('bones')}")
+        return {'FINISHED'}
+
+    def other_influence_counts(self, obj, vert_indices, source_name, bone_names):
+        """统计每个顶点上除源组和骨骼链以外的骨骼组数量"""
+        excluded = {source_name, *bone_names}
+        group_ids = [group_id for group_id in get_deform_group_indices(obj)
+                     if obj.vertex_groups[group_id].name not in excluded]
+        if not group_ids:
+            return np.zeros(len(vert_indices), dtype=np.int64)
+        other_verts, other_groups, other_weights = read_group_weights(obj, group_ids, vert_indices)
+        row_of = np.full(len(obj.data.vertices), -1, dtype=np.int64)
+        row_of[vert_indices] = np.arange(len(vert_indices))
+        rows = row_of[other_verts[other_weights > WEIGHT_EPSILON]]
+        return np.bincount(rows, minlength=len(vert_indices))
+
+class L4D2_OT_TransferSurfaceWeights(Operator):
+    bl_idname = "l4d2.transfer_surface_weights"
+    bl_label = _("Transfer Surface Weights")
+    bl_description = _("Copy weights from the active mesh to all other selected meshes by interpolating the nearest surface point")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    chunk_size = 65536
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and context.active_object.type == 'MESH'
+
+    def execute(self, context):
+        # 在编辑模式下也要读取到最新的网格数据并能写入顶点组
+        with object_mode(context):
+            return self.transfer_all(context)
+
+    def transfer_all(self, context):
+        """把活动网格的权重传递到其他所有选中的网格"""
+        source = context.active_object
+        targets = [obj for obj in context.selected_objects if obj.type == 'MESH' and obj != source]
+        if not targets:
+            self.report({'WARNING'}, _("Select the clothing meshes and make the body mesh active"))
+            return {'CANCELLED'}
+
+        if len(source.data.polygons) == 0:
+            self.report({'ERROR'}, _("The active mesh has no faces to transfer weights from"))
+            return {'CANCELLED'}
+
+        # 源网格的骨骼权重以稠密矩阵形式读取一次
+        group_ids_wanted = get_deform_group_indices(source)
+        if not group_ids_wanted:
+            self.report({'WARNING'}, _("The active mesh has no bone vertex groups"))
+            return {'CANCELLED'}
+        column_of = np.zeros(len(source.vertex_groups), dtype=np.int32)
+        column_of[group_ids_wanted] = np.arange(len(group_ids_wanted), dtype=np.int32)
+        vert_indices, group_ids, weights = read_group_weights(source, group_ids_wanted)
+        source_weights = np.zeros((len(source.data.vertices), len(group_ids_wanted)), dtype=np.float32)
+        source_weights[vert_indices, column_of[group_ids]] = weights
+        group_names = [source.vertex_groups[group_id].name for group_id in group_ids_wanted]
+
+        tree, triangles, source_coords = get_surface_bvh(source.data)
+        max_influences = context.scene.max_influences
+
+        transferred = 0
+        label = f"{_('Transfer Surface Weights')} {time.strftime('%H:%M:%S')}"
+        for target in targets:
+            transferred += self.transfer_to(source, target, tree, triangles, source_coords,
+                                            source_weights, group_names, max_influences,
+                                            label, context.scene.snapshot_count)
+
+        self.report({'INFO'}, f"{_('Transferred weights to')} {len(targets)} {_('objects')} ({transferred} {_('vertices')})")
+        return {'FINISHED'}
+
+    def transfer_to(self, source, target, tree, triangles, source_coords, source_weights, group_names, max_influences,
+                    label, max_snapshots):
+        """为单个目标网格插值、限制并写回权重，返回处理的顶点数"""
+        to_source = source.matrix_world.inverted() @ target.matrix_world
+        points = transform_coords(to_source, read_vertex_coords(target.data))
+        vertex_count = len(points)
+        if vertex_count == 0:
+            return 0
+
+        # 批量查询最近表面点
+        nearest = np.empty((vertex_count, 3), dtype=np.float64)
+        faces = np.empty(vertex_count, dtype=np.int64)
+        for index, co in enumerate(points.tolist()):
+            location, normal, face_index, distance = tree.find_nearest(co)
+            if face_index is None:
+                nearest[index] = co
+                faces[index] = 0
+            else:
+                nearest[index] = location
+                faces[index] = face_index
+
+        result = np.zeros((vertex_count, len(group_names)), dtype=np.float32)
+        for start in range(0, vertex_count, self.chunk_size):
+            stop = start + self.chunk_size
+            corners = triangles[faces[start:stop]]
+            bary = barycentric_coords(nearest[start:stop],
+                                      source_coords[corners[:, 0]].astype(np.float64),
+                                      source_coords[corners[:, 1]].astype(np.float64),
+                                      source_coords[corners[:, 2]].astype(np.float64))
+            interpolated = (bary[:, 0, None] * source_weights[corners[:, 0]] +
+                            bary[:, 1, None] * source_weights[corners[:, 1]] +
+                            bary[:, 2, None] * source_weights[corners[:, 2]])
+            interpolated = keep_top_columns(interpolated, max_influences)
+            totals = interpolated.sum(axis=1, keepdims=True)
+            result[start:stop] = np.where(totals > 0.0, interpolated / np.maximum(totals, 1e-12), 0.0)
+
+        # 目标网格上同名顶点组先整体清空，再按权重桶批量写入
+        take_weight_snapshot(target, label, [], max_snapshots)
+        invalidate_split_cache(target)
+        all_indices = list(range(vertex_count))
+        for column, group_name in enumerate(group_names):
+            keep = result[:, column] > WEIGHT_EPSILON
+            group = target.vertex_groups.get(group_name)
+            if group:
+                group.remove(all_indices)
+            elif not keep.any():
+                continue
+            else:
+                group = target.vertex_groups.new(name=group_name)
+            kept_indices = np.flatnonzero(keep)
+            write_group_weights(group, kept_indices, result[kept_indices, column])
+        return vertex_count
+
+class L4D2_OT_CollapseMappedWeights(Operator, bone_modify.L4D2_OT_BaseOperator):
+    bl_idname = "l4d2.collapse_mapped_weights"
+    bl_label = _("Collapse Custom Weights")
+    bl_description = _("Fold the weights of every mapped custom bone into its official bone on all meshes bound to the custom armature")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    remove_groups: BoolProperty(
+        name=_("Remove Emptied Groups"),
+        description=_("Delete the custom vertex groups after their weights are folded"),
+        default=True
+    )
+    remove_bones: BoolProperty(
+        name=_("Remove Custom Bones"),
+        description=_("Delete the folded custom bones from the custom armature"),
+        default=False
+    )
+
+    def execute(self, context):
+        armature = context.scene.Custom_Armature
+        if not armature:
+            self.report({'ERROR'}, _("Please select the custom armature first"))
+            return {'CANCELLED'}
+        if not self._load_mapping_data(context):
+            return {'CANCELLED'}
+
+        mesh_objects = get_related_mesh_objects(armature)
+        if not mesh_objects:
+            self.report({'WARNING'}, _("Could not find mesh objects associated with the armature"))
+            return {'CANCELLED'}
+
+        official_to_customs = bone_modify.build_mapping_relation()
+        official_names = set(official_to_customs)
+        folded_groups = set()
+        touched = 0
+        label = f"{_('Collapse Custom Weights')} {time.strftime('%H:%M:%S')}"
+
+        for obj in mesh_objects:
+            source_to_target = self.build_group_mapping(obj, official_to_customs, official_names)
+            if source_to_target:
+                take_weight_snapshot(obj, label, [], context.scene.snapshot_count)
+            invalidate_split_cache(obj)
+            touched += collapse_group_weights(obj, source_to_target)
+            folded_groups.update(source_to_target)
+            if self.remove_groups:
+                for group_name in source_to_target:
+                    obj.vertex_groups.remove(obj.vertex_groups[group_name])
+
+        removed_bones = self.remove_custom_bones(context, armature, folded_groups) if self.remove_bones else 0
+
+        self.report({'INFO'}, f"{_('Folded')} {len(folded_groups)} {_('custom groups')} ({touched} {_('vertices')}), "
+                              f"{_('removed')} {removed_bones} {_('bones')}")
+        return {'FINISHED'}
+
+    @staticmethod
+    def build_group_mapping(obj, official_to_customs, official_names):
+        """按简化名称匹配网格上的自定义顶点组，返回 {自定义组名: 官方骨骼名}"""
+        simplified_groups = {bone_modify.simplify_bonename(group.name): group.name for group in obj.vertex_groups}
+        source_to_target = {}
+        for official_name, custom_names in official_to_customs.items():
+            for custom_name in custom_names:
+                group_name = simplified_groups.get(bone_modify.simplify_bonename(custom_name))
+                if group_name and group_name not in official_names and group_name not in source_to_target:
+                    source_to_target[group_name] = official_name
+        return source_to_target
+
+    @staticmethod
+    def remove_custom_bones(context, armature, bone_names):
+        """在编辑模式下删除已折叠的自定义骨骼，返回删除数量"""
+        if not bone_names:
+            return 0
+        original_active = context.view_layer.objects.active
+        if context.object and context.object.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        context.view_layer.objects.active = armature
+        bpy.ops.object.mode_set(mode='EDIT')
+        edit_bones = armature.data.edit_bones
+        removed = 0
+        for bone_name in bone_names:
+            bone = edit_bones.get(bone_name)
+            if bone:
+                edit_bones.remove(bone)
+                removed += 1
+        bpy.ops.object.mode_set(mode='OBJECT')
+        context.view_layer.objects.active = original_active
+        return removed
+
+def get_snapshot_target(operator, context):
+    """返回恢复快照的目标网格，无效时报告警告并返回 None"""
+    scene = context.scene
+    obj = bpy.data.objects.get(scene.target_mesh_object) if scene.target_mesh_object else None
+    if not obj or obj.type != 'MESH':
+        operator.report({'WARNING'}, _("Target object is invalid or not a mesh object"))
+        return None
+    if not get_weight_snapshots(obj):
+        operator.report({'WARNING'}, _("No weight snapshots for the target object"))
+        return None
+    return obj
+
+class L4D2_OT_RestoreLastSnapshot(Operator):
+    bl_idname = "l4d2.restore_last_snapshot"
+    bl_label = _("Restore Last")
+    bl_description = _("Restore the vertex groups touched by the last weight operation on the target object")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        obj = get_snapshot_target(self, context)
+        if obj is None:
+            return {'CANCELLED'}
+        snapshot = get_weight_snapshots(obj)[-1]
+        with object_mode(context):
+            restore_to_snapshot(obj, snapshot.serial)
+        self.report({'INFO'}, f"{_('Restored snapshot')}: {snapshot.label}")
+        return {'FINISHED'}
+
+class L4D2_OT_RestoreSnapshot(Operator):
+    bl_idname = "l4d2.restore_snapshot"
+    bl_label = _("Restore Snapshot")
+    bl_description = _("Restore the target object's vertex groups to the state before the chosen weight operation")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    snapshot: bpy.props.EnumProperty(
+        name=_("Snapshot"),
+        items=get_snapshot_items
+    )
+
+    def execute(self, context):
+        obj = get_snapshot_target(self, context)
+        if obj is None or self.snapshot == 'NONE':
+            return {'CANCELLED'}
+        with object_mode(context):
+            restored = restore_to_snapshot(obj, int(self.snapshot))
+        if restored == 0:
+            self.report({'WARNING'}, _("Snapshot no longer exists"))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"{_('Restored')} {restored} {_('snapshots')}")
+        return {'FINISHED'}
+
+class WeightAnalysisItem(PropertyGroup):
+    name: StringProperty()
+    is_material: BoolProperty(default=False)
+    bone_count: IntProperty()
+    over_limit: IntProperty()
+    zero_groups: IntProperty()
+
+class L4D2_UL_WeightAnalysis(UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname):
+        if self.layout_type in {'DEFAULT', 'COMPACT'}:
+            row = layout.row(align=True)
+            name_row = row.row()
+            if item.is_material:
+                name_row.label(text="", icon="BLANK1")
+            name_row.label(text=item.name, icon="MATERIAL" if item.is_material else "MESH_DATA")
+            row.label(text=f"{item.bone_count} {_('bones')}")
+            over_row = row.row()
+            over_row.alert = item.over_limit > 0
+            over_row.label(text=f"{item.over_limit} {_('over limit')}")
+            if not item.is_material:
+                zero_row = row.row()
+                zero_row.alert = item.zero_groups > 0
+                zero_row.label(text=f"{item.zero_groups} {_('empty groups')}")
+
+class L4D2_OT_AnalyzeWeightBudget(Operator):
+    bl_idname = "l4d2.analyze_weight_budget"
+    bl_label = _("Analyze Bone Budget")
+    bl_description = _("Count weighted bones per mesh and material, vertices over the influence limit, empty groups and bones without groups")
+
+    def execute(self, context):
+        global _last_analysis
+        scene = context.scene
+        obj = bpy.data.objects.get(scene.target_mesh_object) if scene.target_mesh_object else None
+        armature = get_armature_object(obj) if obj and obj.type == 'MESH' else None
+        if armature is None and context.active_object and context.active_object.type == 'ARMATURE':
+            armature = context.active_object
+        if armature is None:
+            self.report({'WARNING'}, _("Select an armature or a target mesh bound to an armature"))
+            return {'CANCELLED'}
+
+        mesh_objects = get_related_mesh_objects(armature)
+        if not mesh_objects:
+            self.report({'WARNING'}, _("No meshes are bound to the armature"))
+            return {'CANCELLED'}
+
+        start_time = time.perf_counter()
+        _last_analysis = analyze_weight_budget(armature, mesh_objects, scene.max_influences)
+        elapsed = (time.perf_counter() - start_time) * 1000.0
+
+        # 网格行后紧跟其材质行
+        scene.weight_analysis_items.clear()
+        for mesh in _last_analysis["meshes"]:
+            item = scene.weight_analysis_items.add()
+            item.name = mesh["name"]
+            item.bone_count = len(mesh["weighted_bones"])
+            item.over_limit = mesh["over_limit"]
+            item.zero_groups = len(mesh["zero_weight_groups"])
+            for material in mesh["materials"]:
+                item = scene.weight_analysis_items.add()
+                item.name = material["name"]
+                item.is_material = True
+                item.bone_count = material["weighted_bones"]
+                item.over_limit = material["over_limit"]
+
+        level = 'WARNING' if _last_analysis["bone_count"] > STUDIOMDL_MAX_BONES else 'INFO'
+        self.report({level}, f"{_last_analysis['bone_count']}/{STUDIOMDL_MAX_BONES} {_('bones')}, "
+                             f"{len(mesh_objects)} {_('objects')}, {elapsed:.1f} ms")
+        return {'FINISHED'}
+
+class L4D2_OT_ExportWeightAnalysis(Operator):
+    bl_idname = "l4d2.export_weight_analysis"
+    bl_label = _("Export Analysis")
+    bl_description = _("Export the last bone budget analysis as JSON")
+
+    filepath: StringProperty(subtype="FILE_PATH")
+
+    def execute(self, context):
+        if not _last_analysis:
+            self.report({'WARNING'}, _("Run the bone budget analysis first"))
+            return {'CANCELLED'}
+        try:
+            with open(bpy.path.abspath(self.filepath), 'w', encoding='utf-8') as f:
+                json.dump(_last_analysis, f, indent=4, ensure_ascii=False)
+        except OSError as e:
+            self.report({'ERROR'}, f"{_('Failed to export analysis')}: {str(e)}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"{_('Analysis exported to')} {self.filepath}")
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        if not _last_analysis:
+            self.report({'WARNING'}, _("Run the bone budget analysis first"))
+            return {'CANCELLED'}
+        self.filepath = bpy.path.ensure_ext(f"{_last_analysis['armature']}_bone_budget", ".json")
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+class L4D2_OT_PruneWeights(Operator):
+    bl_idname = "l4d2.prune_weights"
+    bl_label = _("Prune Weights")
+    bl_description = _("Remove near-zero weights and the bone vertex groups they empty on all meshes bound to the target object's armature")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    threshold: FloatProperty(
+        name=_("Threshold"),
+        description=_("Weights below this value are removed"),
+        default=WEIGHT_EPSILON,
+        min=0.0,
+        max=0.1,
+        precision=4
+    )
+    remove_empty_groups: BoolProperty(
+        name=_("Remove Empty Groups"),
+        description=_("Delete bone vertex groups whose weights were all removed by pruning"),
+        default=True
+    )
+
+    def execute(self, context):
+        scene = context.scene
+        obj = bpy.data.objects.get(scene.target_mesh_object) if scene.target_mesh_object else None
+        if not obj or obj.type != 'MESH':
+            self.report({'WARNING'}, _("Target object is invalid or not a mesh object"))
+            return {'CANCELLED'}
+
+        armature = get_armature_object(obj)
+        mesh_objects = (get_related_mesh_objects(armature) if armature else []) or [obj]
+
+        removed_entries = 0
+        removed_groups = 0
+        with object_mode(context):
+            for mesh_obj in mesh_objects:
+                take_weight_snapshot(mesh_obj, f"{_('Prune Weights')} {time.strftime('%H:%M:%S')}", [],
+                                     scene.snapshot_count)
+                invalidate_split_cache(mesh_obj)
+                entries, groups = prune_small_weights(mesh_obj, self.threshold, self.remove_empty_groups)
+                removed_entries += entries
+                removed_groups += groups
+                if entries:
+                    mesh_obj.data.update()
+
+        saved_bytes = removed_entries * DEFORM_WEIGHT_BYTES
+        self.report({'INFO'}, f"{_('Removed')} {removed_entries} {_('weight entries')} ({saved_bytes / 1024:.1f} KB), "
+                              f"{removed_groups} {_('vertex groups')}, {len(mesh_objects)} {_('objects')}")
+        return {'FINISHED'}
+
+class L4D2_OT_ExportWeightData(Operator):
+    bl_idname = "l4d2.export_weight_data"
+    bl_label = _("Export Weights")
+    bl_description = _("Write all vertex groups of the selected meshes to a compressed .npz file")
+
+    filepath: StringProperty(subtype="FILE_PATH")
+    filter_glob: StringProperty(default="*.npz", options={'HIDDEN'})
+
+    def execute(self, context):
+        mesh_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        if not mesh_objects:
+            self.report({'WARNING'}, _("Please select at least one mesh object"))
+            return {'CANCELLED'}
+
+        filepath = bpy.path.ensure_ext(bpy.path.abspath(self.filepath), ".npz")
+        start_time = time.perf_counter()
+        entries = 0
+        try:
+            # 逐个网格写入压缩包，内存中只保留当前网格的数组
+            with zipfile.ZipFile(filepath, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                write_npz_array(archive, "version", np.int64(WEIGHT_DATA_VERSION))
+                write_npz_array(archive, "mesh_count", np.int64(len(mesh_objects)))
+                for index, obj in enumerate(mesh_objects):
+                    entries += export_mesh_weights(archive, f"mesh{index}_", obj)
+        except OSError as e:
+            self.report({'ERROR'}, f"{_('Failed to export weights')}: {str(e)}")
+            return {'CANCELLED'}
+
+        elapsed = time.perf_counter() - start_time
+        size_kb = os.path.getsize(filepath) / 1024
+        self.report({'INFO'}, f"{_('Exported')} {len(mesh_objects)} {_('objects')}, {entries} {_('weight entries')} "
+                              f"({size_kb:.1f} KB, {elapsed:.2f} s)")
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = bpy.path.ensure_ext(bpy.path.display_name_sans_ext(bpy.data.filepath) or "weights", ".npz")
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+class L4D2_OT_ImportWeightData(Operator):
+    bl_idname = "l4d2.import_weight_data"
+    bl_label = _("Import Weights")
+    bl_description = _("Restore vertex groups of the selected meshes from a .npz weight file, matching meshes by name")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filepath: StringProperty(subtype="FILE_PATH")
+    filter_glob: StringProperty(default="*.npz", options={'HIDDEN'})
+    ignore_topology: BoolProperty(
+        name=_("Ignore Topology Check"),
+        description=_("Import even if the mesh topology differs from the file, as long as the vertex count matches"),
+        default=False
+    )
+
+    def execute(self, context):
+        mesh_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        if not mesh_objects:
+            self.report({'WARNING'}, _("Please select at least one mesh object"))
+            return {'CANCELLED'}
+
+        start_time = time.perf_counter()
+        imported = 0
+        entries = 0
+        try:
+            # np.load 按需解压各数组，每次只读取一个网格的数据；顶点组只能在物体模式下写入
+            with object_mode(context), np.load(bpy.path.abspath(self.filepath)) as data:
+                mesh_count = int(data["mesh_count"])
+                names = [str(data[f"mesh{index}_name"]) for index in range(mesh_count)]
+                by_name = {obj.name: obj for obj in mesh_objects}
+                # 文件和选择中都只有一个网格时不要求名称一致
+                if mesh_count == 1 and len(mesh_objects) == 1:
+                    by_name = {names[0]: mesh_objects[0]}
+
+                for index, name in enumerate(names):
+                    obj = by_name.get(name)
+                    if obj is None:
+                        continue
+                    prefix = f"mesh{index}_"
+                    if int(data[f"{prefix}vertex_count"]) != len(obj.data.vertices) or (
+                            not self.ignore_topology and str(data[f"{prefix}hash"]) != mesh_topology_hash(obj.data)):
+                        self.report({'WARNING'}, f"{obj.name}: {_('Topology does not match the weight file, skipped')}")
+                        continue
+                    take_weight_snapshot(obj, f"{_('Import Weights')} {time.strftime('%H:%M:%S')}", [],
+                                         context.scene.snapshot_count)
+                    invalidate_split_cache(obj)
+                    entries += import_mesh_weights(data, prefix, obj)
+                    obj.data.update()
+                    imported += 1
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile) as e:
+            self.report({'ERROR'}, f"{_('Failed to import weights')}: {str(e)}")
+            return {'CANCELLED'}
+
+        elapsed = time.perf_counter() - start_time
+        self.report({'INFO'}, f"{_('Imported')} {imported} {_('objects')}, {entries} {_('weight entries')} ({elapsed:.2f} s)")
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
 
 # 用于存储关联物体列表的属性类
 class RelatedObjectItem(PropertyGroup):
@@ -871,7 +2778,9 @@ class L4D2_OT_AddEmptyVertexGroup(Operator):
 classes = [
     VertexGroupItem,
     RelatedObjectItem,
+    WeightAnalysisItem,
     L4D2_UL_VertexGroups,
+    L4D2_UL_WeightAnalysis,
     # L4D2_PT_WeightsPanel,
     L4D2_OT_AddFromSelectedBones,
     L4D2_OT_SelectMeshObject,
@@ -880,6 +2789,16 @@ classes = [
     L4D2_OT_ClearVertexGroups,
     L4D2_OT_RemoveVertexGroup,
     L4D2_OT_ProcessVertexGroups,
+    L4D2_OT_ChainProjectionWeights,
+    L4D2_OT_TransferSurfaceWeights,
+    L4D2_OT_CollapseMappedWeights,
+    L4D2_OT_PruneWeights,
+    L4D2_OT_RestoreLastSnapshot,
+    L4D2_OT_RestoreSnapshot,
+    L4D2_OT_AnalyzeWeightBudget,
+    L4D2_OT_ExportWeightData,
+    L4D2_OT_ImportWeightData,
+    L4D2_OT_ExportWeightAnalysis,
     L4D2_OT_DrawSplitLine,
     L4D2_OT_SetSplitMode,
     L4D2_OT_AddEmptyVertexGroup  # 添加新的操作器类
@@ -892,6 +2811,9 @@ def register():
         except Exception as e:
             # 抑制重复注册的错误消息
             pass
+
+    # 添加依赖图更新处理器，物体更新时丢弃求值坐标缓存
+    bpy.app.handlers.depsgraph_update_post.append(evaluated_coords_depsgraph_handler)
     
     try:
         bpy.types.Scene.vertex_group_names = CollectionProperty(type=VertexGroupItem)
@@ -913,7 +2835,8 @@ def register():
                 description=_("Smoothness of the transition area for bisect weight (0=Hard Split, 1=Max Smoothness)"),
                 default=0.5,
                 min=0.0,
-                max=1.0
+                max=1.0,
+                update=update_blend_factor
             )
             
         # 添加分割线属性
@@ -942,6 +2865,112 @@ def register():
                 default=False
             )
             
+        bpy.types.Scene.weight_analysis_items = CollectionProperty(type=WeightAnalysisItem)
+        bpy.types.Scene.weight_analysis_index = bpy.props.IntProperty(default=0)
+        bpy.types.Scene.use_evaluated_positions = BoolProperty(
+            name=_("Use Posed Positions"),
+            description=_("Split and distribute weights using vertex positions after pose, shape keys and modifiers"),
+            default=False
+        )
+        bpy.types.Scene.geodesic_seed = bpy.props.EnumProperty(
+            name=_("Seeds"),
+            description=_("Where the surface distance split starts from"),
+            items=[
+                ('BONES', _("Bone Heads"), _("Seed from the mesh vertices nearest to the target bones' heads")),
+                ('PICKED', _("Picked Vertices"), _("Seed from the vertices picked in order in edit mode")),
+            ],
+            default='BONES'
+        )
+        bpy.types.Scene.weight_mask_mode = bpy.props.EnumProperty(
+            name=_("Weight Mask"),
+            description=_("Restrict vertex group operations to a subset of vertices"),
+            items=[
+                ('NONE', _("All Vertices"), _("Operate on every vertex")),
+                ('SELECTION', _("Selected Vertices"), _("Operate on the vertices selected in edit mode")),
+                ('GROUP', _("Mask Group"), _("Operate on the vertices weighted in the mask vertex group")),
+                ('MATERIAL', _("Material"), _("Operate on the vertices of faces using the material slot")),
+            ],
+            default='NONE'
+        )
+        bpy.types.Scene.weight_mask_group = StringProperty(
+            name=_("Mask Group"),
+            description=_("Vertex group whose weighted vertices are processed")
+        )
+        bpy.types.Scene.weight_mask_material = bpy.props.IntProperty(
+            name=_("Material Index"),
+            description=_("Material slot index whose faces' vertices are processed"),
+            default=0,
+            min=0
+        )
+        bpy.types.Scene.snapshot_count = bpy.props.IntProperty(
+            name=_("Snapshots"),
+            description=_("Number of weight snapshots kept per mesh before each vertex group operation (0 disables snapshots)"),
+            default=8,
+            min=0,
+            max=64
+        )
+        bpy.types.Scene.max_influences = bpy.props.IntProperty(
+            name=_("Max Influences"),
+            description=_("Maximum number of bone influences kept per vertex (StudioMDL uses 3)"),
+            default=3,
+            min=1,
+            max=8
+        )
+        bpy.types.Scene.smooth_iterations = bpy.props.IntProperty(
+            name=_("Iterations"),
+            description=_("Number of smoothing iterations"),
+            default=5,
+            min=1,
+            max=200
+        )
+        bpy.types.Scene.smooth_factor = FloatProperty(
+            name=_("Smooth Factor"),
+            description=_("How far each iteration moves a weight towards its neighbours' average"),
+            default=0.5,
+            min=0.0,
+            max=1.0
+        )
+        bpy.types.Scene.live_blend = BoolProperty(
+            name=_("Live Blend"),
+            description=_("Re-split the last bisect or band split immediately when the blend factor changes"),
+            default=False
+        )
+        bpy.types.Scene.mirror_mode = bpy.props.EnumProperty(
+            name=_("Mirror Mode"),
+            description=_("How weights are mirrored between left and right groups"),
+            items=[
+                ('LEFT_TO_RIGHT', _("Left to Right"), _("Rebuild the right groups from the left groups")),
+                ('RIGHT_TO_LEFT', _("Right to Left"), _("Rebuild the left groups from the right groups")),
+                ('SYMMETRIZE', _("Symmetrize"), _("Average both sides so they match")),
+            ],
+            default='LEFT_TO_RIGHT'
+        )
+        bpy.types.Scene.mirror_tolerance = FloatProperty(
+            name=_("Mirror Tolerance"),
+            description=_("Maximum distance between a vertex and its mirrored counterpart"),
+            default=0.001,
+            min=0.00001,
+            max=0.1,
+            precision=5
+        )
+        bpy.types.Scene.process_all_meshes = BoolProperty(
+            name=_("All Bound Meshes"),
+            description=_("Apply to every mesh bound to the target object's armature instead of only the target object"),
+            default=False
+        )
+
+        # 添加均分模式属性
+        if not hasattr(bpy.types.Scene, 'even_transfer_mode'):
+            bpy.types.Scene.even_transfer_mode = bpy.props.EnumProperty(
+                name=_("Even Transfer Mode"),
+                description=_("How the first group's weight is divided among the target groups"),
+                items=[
+                    ('EVEN', _("Even"), _("Give every target group the same share")),
+                    ('DISTANCE', _("By Bone Distance"), _("Give closer target bones a larger share")),
+                ],
+                default='EVEN'
+            )
+
         # 添加分割模式属性
         if not hasattr(bpy.types.Scene, 'split_mode'):
             bpy.types.Scene.split_mode = bpy.props.EnumProperty(
@@ -952,6 +2981,7 @@ def register():
                     ('Y_AXIS', _("Y Axis"), _("Split weights along the Y axis"), 'AXIS_FRONT', 1),
                     ('Z_AXIS', _("Z Axis"), _("Split weights along the Z axis"), 'AXIS_TOP', 2),
                     ('CUSTOM', _("Custom"), _("Use custom split line"), 'CURVE_PATH', 3),
+                    ('GEODESIC', _("Surface"), _("Split weights by surface distance from two seeds"), 'DRIVER_DISTANCE', 4),
                 ],
                 default='X_AXIS'
             )
@@ -961,6 +2991,11 @@ def register():
         pass
 
 def unregister():
+    # 移除依赖图更新处理器
+    if evaluated_coords_depsgraph_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(evaluated_coords_depsgraph_handler)
+    _evaluated_coords_cache.clear()
+
     for cls in reversed(classes):
         try:
             bpy.utils.unregister_class(cls)
@@ -988,6 +3023,24 @@ def unregister():
         if hasattr(bpy.types.Scene, 'use_custom_split_line'):
             del bpy.types.Scene.use_custom_split_line
             
+        if hasattr(bpy.types.Scene, 'even_transfer_mode'):
+            del bpy.types.Scene.even_transfer_mode
+        del bpy.types.Scene.max_influences
+        del bpy.types.Scene.process_all_meshes
+        del bpy.types.Scene.smooth_iterations
+        del bpy.types.Scene.smooth_factor
+        del bpy.types.Scene.mirror_mode
+        del bpy.types.Scene.live_blend
+        del bpy.types.Scene.snapshot_count
+        del bpy.types.Scene.weight_mask_mode
+        del bpy.types.Scene.geodesic_seed
+        del bpy.types.Scene.use_evaluated_positions
+        del bpy.types.Scene.weight_mask_group
+        del bpy.types.Scene.weight_mask_material
+        del bpy.types.Scene.weight_analysis_items
+        del bpy.types.Scene.weight_analysis_index
+        del bpy.types.Scene.mirror_tolerance
+
         # 删除分割模式属性
         if hasattr(bpy.types.Scene, 'split_mode'):
             del bpy.types.Scene.split_mode